@@ -0,0 +1,241 @@
+"""
+Persistent catalog of the data/ tree.
+One scan records every rep file (method, subject, rep, class, sample/channel counts, hash) and continuous session in
+data/catalog.json, and converts each CSV to a .npy copy under data/.catalog that is loaded memory-mapped afterwards.
+Folders outside data/ (e.g. synthetic cohorts) are catalogued from their method folder, with their index and arrays also
+kept under data/.catalog so recorded data folders are never written to.
+Later scans only re-read files whose size or mtime changed. Selections return ready-to-window arrays, so scripts no
+longer need to walk directories or regex filenames.
+Date created: 2026-10-19
+"""
+import os
+import re
+import json
+import hashlib
+import warnings
+
+import numpy as np
+
+from training import DATA_FOLDER
+from continuous import is_continuous_session, read_stream, STREAM_FILENAME
+from profiling import profiled, count
+
+
+CATALOG_VERSION = 1
+CATALOG_FILENAME = 'catalog.json'
+ARRAY_FOLDER = '.catalog'
+CACHE_FOLDER = os.path.join(DATA_FOLDER, ARRAY_FOLDER)
+REP_FILE_REGEX = re.compile(r'^R_(\d+)_C_(\d+)\.csv$')
+
+
+def hash_file(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def read_csv(path):
+    with open(path, 'r') as f:
+        first_line = f.readline()
+    if first_line.startswith(','):
+        # Saved by pandas with its index: header row plus an index column
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')     # header-only files are empty
+            data = np.loadtxt(path, delimiter=',', ndmin=2, skiprows=1)
+        return data[:, 1:]
+    data = np.loadtxt(path, delimiter=',', ndmin=2)
+    # Files saved by training.vr_training (pandas) start with a 0..N-1 column header row
+    if len(data) and np.array_equal(data[0], np.arange(data.shape[1])):
+        data = data[1:]
+    return data
+
+
+def read_class_names(folder):
+    metadata_path = os.path.join(folder, 'metadata.json')
+    if not os.path.exists(metadata_path):
+        return {}
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+    # Keys are the paths the files were recorded under, which may not match where they are now
+    return {os.path.basename(key): value['class_name'] for key, value in metadata.items() if isinstance(value, dict) and 'class_name' in value}
+
+
+class Catalog:
+    def __init__(self, root = DATA_FOLDER, cache_folder = CACHE_FOLDER):
+        self.root = root
+        # Arrays are named by content hash, so every catalog can share one folder
+        self.array_folder = cache_folder
+        if os.path.abspath(root) == os.path.abspath(DATA_FOLDER):
+            self.index_path = os.path.join(root, CATALOG_FILENAME)
+        else:
+            root_key = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()[:16]
+            self.index_path = os.path.join(cache_folder, f'catalog-{root_key}.json')
+        self.entries = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if index['version'] == CATALOG_VERSION:
+                self.entries = index['entries']
+
+    @profiled('catalog_refresh')
+    def refresh(self):
+        """Rescan the tree, re-reading only new or modified files, and save the index if it changed. Returns self."""
+        entries = {}
+        for folder, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(dirname for dirname in dirnames if not dirname.startswith('.'))
+            relative_folder = os.path.relpath(folder, self.root)
+            if relative_folder == '.':
+                # Files directly under the root (when the catalog is rooted at a single subject folder)
+                relative_folder = method = subject = ''
+            else:
+                # e.g. sgt/subject0 -> ('sgt', 'subject0'), archive/vr/subject0 -> ('archive/vr', 'subject0')
+                parts = relative_folder.split(os.sep)
+                method, subject = os.sep.join(parts[:-1]), parts[-1]
+            if is_continuous_session(folder):
+                key = os.path.join(relative_folder, STREAM_FILENAME)
+                entries[key] = self._continuous_entry(folder, key, method, subject)
+            class_names = None
+            for filename in sorted(filenames):
+                match = REP_FILE_REGEX.match(filename)
+                if match is None:
+                    continue
+                if class_names is None:
+                    class_names = read_class_names(folder)
+                key = os.path.join(relative_folder, filename)
+                try:
+                    entry = self._rep_entry(os.path.join(folder, filename), key, method, subject)
+                except ValueError as e:
+                    print(f'Skipping {os.path.join(folder, filename)} because it could not be read: {e}')
+                    continue
+                entry.update(rep=int(match.group(1)), class_idx=int(match.group(2)), class_name=class_names.get(filename))
+                entries[key] = entry
+        if entries == self.entries and os.path.exists(self.index_path):
+            return self
+        self.entries = entries
+        os.makedirs(os.path.dirname(self.index_path) or os.curdir, exist_ok=True)
+        with open(self.index_path, 'w') as f:
+            json.dump({'version': CATALOG_VERSION, 'entries': entries}, f, indent=1)
+        return self
+
+    def _is_current(self, key, path):
+        entry = self.entries.get(key)
+        stat = os.stat(path)
+        return entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size
+
+    def _rep_entry(self, path, key, method, subject):
+        if self._is_current(key, path) and os.path.exists(os.path.join(self.array_folder, self.entries[key]['hash'] + '.npy')):
+            return dict(self.entries[key], method=method, subject=subject)
+        stat = os.stat(path)
+        file_hash = hash_file(path)
+        array_path = os.path.join(self.array_folder, file_hash + '.npy')
+        if os.path.exists(array_path):
+            data = np.load(array_path, mmap_mode='r')
+        else:
+            data = read_csv(path).astype(np.float32)
+            count('bytes_read', stat.st_size)
+            os.makedirs(self.array_folder, exist_ok=True)
+            np.save(array_path, data)
+        return {
+            'type': 'rep', 'method': method, 'subject': subject, 'mtime': stat.st_mtime, 'size': stat.st_size,
+            'hash': file_hash, 'num_samples': data.shape[0], 'num_channels': data.shape[1]
+        }
+
+    def _continuous_entry(self, folder, key, method, subject):
+        path = os.path.join(folder, STREAM_FILENAME)
+        # Continuous streams are append-only binary files, already memory-mappable, so only their shape is recorded
+        if self._is_current(key, path):
+            return dict(self.entries[key], method=method, subject=subject)
+        stat = os.stat(path)
+        data, _ = read_stream(folder)
+        return {
+            'type': 'continuous', 'method': method, 'subject': subject, 'mtime': stat.st_mtime, 'size': stat.st_size,
+            'num_samples': data.shape[0], 'num_channels': data.shape[1]
+        }
+
+    def select(self, method = None, subject = None, folder = None, reps = None, classes = None, entry_type = 'rep'):
+        """Return (key, entry) pairs matching every given filter. folder is a path to a subject folder, e.g. 'data/sgt/subject0/'."""
+        if folder is not None:
+            folder = os.path.relpath(os.path.normpath(folder), self.root)
+            folder = '' if folder == '.' else folder
+        matches = []
+        for key, entry in sorted(self.entries.items()):
+            if entry['type'] != entry_type:
+                continue
+            if folder is not None and os.path.dirname(key) != folder:
+                continue
+            if method is not None and entry['method'] != method:
+                continue
+            if subject is not None and entry['subject'] != subject:
+                continue
+            if reps is not None and entry['rep'] not in reps:
+                continue
+            if classes is not None and entry['class_idx'] not in classes:
+                continue
+            matches.append((key, entry))
+        return matches
+
+    def subject_folders(self, method_folder):
+        """Paths of the subject folders in method_folder (e.g. 'data/sgt') that contain rep files or a continuous session."""
+        method = os.path.relpath(os.path.normpath(method_folder), self.root)
+        method = '' if method == '.' else method
+        folders = {os.path.dirname(key) for key, entry in self.entries.items() if entry['method'] == method and entry['subject'] != ''}
+        return [os.path.join(self.root, folder, '') for folder in sorted(folders)]
+
+    def load(self, entry):
+        """Memory-map a rep file's samples as a (samples, channels) array."""
+        count('bytes_read', entry['num_samples'] * entry['num_channels'] * 4)
+        return np.load(os.path.join(self.array_folder, entry['hash'] + '.npy'), mmap_mode='r')
+
+    def load_windows(self, selection, window_size, window_increment):
+        """Window every selected rep file. Returns (windows, metadata) like libemg's OfflineDataHandler.parse_windows."""
+        from classification import get_windows
+        windows = []
+        classes = []
+        reps = []
+        for _, entry in selection:
+            if entry['num_samples'] < window_size:
+                continue
+            file_windows = get_windows(self.load(entry), window_size, window_increment)
+            windows.append(file_windows)
+            classes.append(np.full(len(file_windows), entry['class_idx']))
+            reps.append(np.full(len(file_windows), entry['rep']))
+        if len(windows) == 0:
+            raise ValueError('No data matched the selection.')
+        metadata = {
+            'classes': np.concatenate(classes),
+            'reps': np.concatenate(reps)
+        }
+        return np.concatenate(windows), metadata
+
+
+_catalogs = {}
+
+
+def _contains(root, path):
+    root, path = os.path.abspath(root), os.path.abspath(path)
+    return os.path.commonpath([root, path]) == root
+
+
+def _is_subject_folder(folder):
+    return is_continuous_session(folder) or any(REP_FILE_REGEX.match(filename) for filename in os.listdir(folder))
+
+
+def get_catalog(data_folder = DATA_FOLDER):
+    """
+    Return the refreshed catalog whose root contains data_folder: DATA_FOLDER, an already open catalog or, failing those,
+    a new one rooted at data_folder - or at its parent (method) folder if data_folder is a subject folder, so all of a
+    cohort's subjects share one catalog whichever folder is requested first.
+    """
+    for root, catalog in _catalogs.items():
+        if _contains(root, data_folder):
+            return catalog
+    if _contains(DATA_FOLDER, data_folder):
+        root = DATA_FOLDER
+    else:
+        root = os.path.normpath(data_folder)
+        if os.path.isdir(root) and _is_subject_folder(root):
+            root = os.path.dirname(root) or os.curdir
+    _catalogs[root] = Catalog(root).refresh()
+    return _catalogs[root]
@@ -3,9 +3,17 @@ Script to display real-time classification using previous data.
 Author: Christian Morrell (cmorrell@unb.ca)
 Date created: 2023-11-03
 """
-import libemg
+import pickle
 
-from training import OUTPUT_FOLDER
+import numpy as np
+
+from training import OUTPUT_FOLDER, NUM_REPS
+from catalog import get_catalog
+from streams import start_streams
+from continuous import is_continuous_session, parse_continuous
+from monitor import MONITOR_ENABLED
+from network import PREDICTION_PORT, PREDICTION_OUTPUT_PORT
+from profiling import profiled, count
 
 
 WINDOW_SIZE = 40
@@ -14,37 +22,35 @@ FEATURES    = ["MAV","ZC","SSC","WL"]
 CLASSIFIER = "SVM"
 LABEL_NAMES = ['Hand Close', 'Hand Open', 'No Motion', 'Wrist Extension', 'Wrist Flexion']
 
+@profiled('parse_data')
 def parse_data(data_folder, reps = None):
-    # Set parsing arguments
-    classes_values = [str(idx) for idx in range(5)] # determine how many classes to consider
-    reps_values = [str(idx) for idx in range(5)]
-    classes_regex = libemg.utils.make_regex(left_bound='_C_', right_bound='.csv', values=classes_values)
-    reps_regex = libemg.utils.make_regex(left_bound='/R_', right_bound='_C_', values=reps_values)
-    filename_map = {
-        'classes': classes_values,
-        'classes_regex': classes_regex,
-        'reps': reps_values,
-        'reps_regex': reps_regex
-    }
-    
-    # Create offline data handler
-    offline_data_handler = libemg.data_handler.OfflineDataHandler()
-    offline_data_handler.get_data(folder_location=data_folder, filename_dic=filename_map)
-
-    if reps is not None:
-        offline_data_handler = offline_data_handler.isolate_data(key='reps', values=reps)
-    
-    # Extract features
-    windows, metadata = offline_data_handler.parse_windows(WINDOW_SIZE, WINDOW_INCREMENT)
+    if is_continuous_session(data_folder):
+        return parse_continuous(data_folder, WINDOW_SIZE, WINDOW_INCREMENT, reps=reps)
+    # Determine how many classes / reps to consider
+    classes_values = list(range(len(LABEL_NAMES)))
+    reps_values = list(range(NUM_REPS)) if reps is None else reps
+    catalog = get_catalog(data_folder)
+    selection = catalog.select(folder=data_folder, reps=reps_values, classes=classes_values)
+    windows, metadata = catalog.load_windows(selection, WINDOW_SIZE, WINDOW_INCREMENT)
     return windows, metadata
 
+def get_windows(data, window_size, window_increment):
+    """Window a (samples, channels) array into (windows, channels, window_size), matching libemg's windowing, without copying."""
+    windows = np.lib.stride_tricks.sliding_window_view(data, window_size, axis=0)
+    return windows[::window_increment]
+
+@profiled('extract_features')
 def extract_features(windows):
+    import libemg
+    count('windows_processed', len(windows))
     feature_extractor = libemg.feature_extractor.FeatureExtractor()
     feature_set = feature_extractor.extract_features(FEATURES, windows)
     return feature_set
 
 
+@profiled('create_offline_classifier')
 def create_offline_classifier(data_folder, reps = None):
+    import libemg
     windows, metadata = parse_data(data_folder, reps=reps)
     feature_set = extract_features(windows)
     # Create offline EMG classifier
@@ -54,22 +60,39 @@ def create_offline_classifier(data_folder, reps = None):
         'training_labels': metadata['classes']
     }
     offline_classifier.fit(CLASSIFIER, feature_dictionary=feature_map)
+    count('fits')
     return offline_classifier
 
 
+def save_classifier(offline_classifier, path):
+    with open(path, 'wb') as f:
+        pickle.dump(offline_classifier, f)
+
+
+def load_classifier(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
 def create_online_classifier(offline_classifier, output_format = 'predictions'):
-    libemg.streamers.myo_streamer()
+    import libemg
+    start_streams()
     online_data_handler = libemg.data_handler.OnlineDataHandler()
     online_data_handler.start_listening()
+    # When monitoring, predictions go through the monitor, which forwards them to libemg's default port
+    port = PREDICTION_PORT if MONITOR_ENABLED else PREDICTION_OUTPUT_PORT
     online_classifier = libemg.emg_classifier.OnlineEMGClassifier(
         offline_classifier, WINDOW_SIZE, WINDOW_INCREMENT, online_data_handler, FEATURES,
-        std_out=True, output_format=output_format
+        port=port, std_out=True, output_format=output_format
     )
     return online_classifier
 
 
-def main():
-    offline_classifier = create_offline_classifier(OUTPUT_FOLDER)
+def main(data_folder = OUTPUT_FOLDER, model_path = None):
+    if model_path is None:
+        offline_classifier = create_offline_classifier(data_folder)
+    else:
+        offline_classifier = load_classifier(model_path)
     
     # Create online classifier
     online_classifier = create_online_classifier(offline_classifier, output_format='probabilities')
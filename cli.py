@@ -0,0 +1,185 @@
+"""
+Single command-line entry point for the project scripts.
+Each subcommand imports the modules it needs only when it runs, so e.g. `python cli.py results --help` never loads libemg.
+Usage: python cli.py {record,train,classify,isofitts,results,monitor,synth,bench-channels,import-report} [options]
+Date created: 2026-10-19
+"""
+import argparse
+import subprocess
+import sys
+
+
+SCRIPT_MODULES = ['training', 'classification', 'isofitts', 'results']
+
+
+def record(args):
+    import training
+    training.main()
+
+
+def train(args):
+    from classification import create_offline_classifier, save_classifier
+    from training import OUTPUT_FOLDER
+    data_folder = args.folder if args.folder is not None else OUTPUT_FOLDER
+    offline_classifier = create_offline_classifier(data_folder)
+    save_classifier(offline_classifier, args.output)
+    print(f'Saved classifier trained on {data_folder} to {args.output}')
+
+
+def classify(args):
+    import classification
+    if args.folder is None:
+        classification.main(model_path=args.model)
+    else:
+        classification.main(data_folder=args.folder, model_path=args.model)
+
+
+def isofitts(args):
+    import isofitts
+    isofitts.main(model_path=args.model)
+
+
+def results(args):
+    import results
+    results.main(profile_folder=args.profile, use_cprofile=args.cprofile)
+
+
+def bench_channels(args):
+    from streams import benchmark_channels
+    benchmark_channels(channel_counts=args.channels, num_windows=args.windows)
+
+
+def monitor(args):
+    from monitor import poll
+    poll(url=args.url, period=args.period)
+
+
+def synth(args):
+    from synthetic import generate_dataset
+    folders = generate_dataset(args.output, args.subjects, methods=args.methods, seed=args.seed, continuous_time=args.continuous_time,
+                               num_sessions=args.sessions, workers=args.workers)
+    print(f'Generated {len(folders)} subject folders in {args.output}')
+
+
+def measure_import_time(module):
+    """
+    Import module in a fresh interpreter and return (cumulative ms, [(ms, name) of its direct imports]), or raise ImportError.
+    Modules already loaded at interpreter startup (e.g. os) cost nothing to import and return (None, []).
+    """
+    # A fresh interpreter is used so modules cached by this process don't hide the real cost
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise ImportError(completed.stderr.strip().splitlines()[-1])
+    timings = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        timings.append((int(cumulative) / 1000, depth, name.strip()))
+    # importtime prints children before their parent, so the direct imports of module are the lines just above it
+    # that are one level deeper
+    module_indices = [idx for idx, (_, depth, name) in enumerate(timings) if name == module and depth == 0]
+    if not module_indices:
+        return None, []
+    module_idx = module_indices[-1]
+    children = []
+    for cumulative, depth, name in reversed(timings[:module_idx]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((cumulative, name))
+    return timings[module_idx][0], children
+
+
+def import_report(args):
+    modules = args.modules if args.modules else SCRIPT_MODULES
+    over_budget = []
+    failed = []
+    for module in modules:
+        try:
+            total, children = measure_import_time(module)
+        except ImportError as e:
+            # A module that can't be imported can't be shown to be within budget
+            print(f'{module}: import failed ({e})')
+            failed.append(module)
+            continue
+        if total is None:
+            print(f'{module}: 0.0 ms (already loaded at interpreter startup)')
+            continue
+        print(f'{module}: {total:.1f} ms')
+        for cumulative, name in sorted(children, reverse=True)[:args.top]:
+            print(f'    {cumulative:8.1f} ms  {name}')
+        if args.budget is not None and total > args.budget:
+            over_budget.append(module)
+    if over_budget:
+        print(f'Modules over the import budget of {args.budget} ms: {over_budget}')
+    if failed:
+        print(f'Modules that failed to import: {failed}')
+    if over_budget or failed:
+        sys.exit(1)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='HCI EMG project tools.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparser = subparsers.add_parser('record', help='Collect training data (SGT or VR, see training.TRAINING_METHOD).')
+    subparser.set_defaults(func=record)
+
+    subparser = subparsers.add_parser('train', help='Fit an offline classifier and save it for later sessions.')
+    subparser.add_argument('--folder', default=None, help='Training data folder. Defaults to training.OUTPUT_FOLDER.')
+    subparser.add_argument('--output', default='classifier.pkl', help='Where to save the fitted classifier.')
+    subparser.set_defaults(func=train)
+
+    subparser = subparsers.add_parser('classify', help='Run and visualize real-time classification.')
+    subparser.add_argument('--folder', default=None, help='Training data folder. Defaults to training.OUTPUT_FOLDER.')
+    subparser.add_argument('--model', default=None, help='Classifier saved by the train subcommand (skips refitting).')
+    subparser.set_defaults(func=classify)
+
+    subparser = subparsers.add_parser('isofitts', help="Run the Fitts' law test.")
+    subparser.add_argument('--model', default=None, help='Classifier saved by the train subcommand (skips refitting).')
+    subparser.set_defaults(func=isofitts)
+
+    subparser = subparsers.add_parser('results', help='Calculate offline and online metrics for the cohort.')
+    subparser.add_argument('--profile', nargs='?', const='profile', default=None, metavar='FOLDER',
+                           help='Write a per-subject stage breakdown to FOLDER/stages.csv (default folder: profile).')
+    subparser.add_argument('--cprofile', action='store_true', help='With --profile, also write a cProfile dump to FOLDER/results.prof.')
+    subparser.set_defaults(func=results)
+
+    subparser = subparsers.add_parser('monitor', help='Print live signal-quality statistics (requires monitor.MONITOR_ENABLED).')
+    subparser.add_argument('--url', default='http://127.0.0.1:8765/stats', help='Monitor stats endpoint.')
+    subparser.add_argument('--period', type=float, default=1, help='Seconds between updates.')
+    subparser.set_defaults(func=monitor)
+
+    subparser = subparsers.add_parser('synth', help='Generate a reproducible synthetic dataset in the data/ layout (under synthetic/ by default).')
+    # Outside data/ so the catalog and session index don't scan (and duplicate) the synthetic cohort
+    subparser.add_argument('--output', default='synthetic', help='Output folder (contains <method>/subject<N>/).')
+    subparser.add_argument('--subjects', type=int, default=10, help='Number of subjects per method.')
+    subparser.add_argument('--methods', nargs='+', default=['sgt', 'vr'], help='Training methods to generate.')
+    subparser.add_argument('--seed', type=int, default=0, help='Dataset seed.')
+    subparser.add_argument('--continuous-time', type=float, default=None, help='Write a continuous session of this many seconds instead of rep files.')
+    subparser.add_argument('--sessions', type=int, default=1, help="Fitts' law sessions per subject.")
+    subparser.add_argument('--workers', type=int, default=1, help='Worker processes.')
+    subparser.set_defaults(func=synth)
+
+    subparser = subparsers.add_parser('bench-channels', help='Benchmark feature extraction and online latency against channel count.')
+    subparser.add_argument('--channels', type=int, nargs='+', default=[8, 16, 32, 64, 128, 256], help='Channel counts to benchmark.')
+    subparser.add_argument('--windows', type=int, default=2000, help='Number of windows per channel count.')
+    subparser.set_defaults(func=bench_channels)
+
+    subparser = subparsers.add_parser('import-report', help='Report how long each script module takes to import.')
+    subparser.add_argument('modules', nargs='*', help=f'Modules to check. Defaults to {SCRIPT_MODULES}.')
+    subparser.add_argument('--top', type=int, default=5, help='Number of heaviest imports to list per module.')
+    subparser.add_argument('--budget', type=float, default=None, help='Exit with an error if any module takes longer than this (ms).')
+    subparser.set_defaults(func=import_report)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Continuous session recording: one append-only EMG stream for the whole session plus a compact label/event track,
+instead of one CSV per (rep, class). The recorder is a UDP tap in front of libemg's OnlineDataHandler, so it writes
+every packet it forwards and no samples are lost between reads. Offline, windows are taken directly from the
+(memory-mapped) stream and labelled from the event track, with the transition at the start of each movement excluded.
+Date created: 2026-10-19
+"""
+import os
+import csv
+import json
+import time
+import pickle
+import socket
+import threading
+
+import numpy as np
+
+from training import REP_TIME
+from profiling import count
+from network import IP, PACKET_SIZE, RECORDING_PORT, MERGED_PORT
+
+
+STREAM_FILENAME = 'emg.bin'
+HEADER_FILENAME = 'stream.json'
+LABELS_FILENAME = 'labels.csv'
+LABEL_COLUMNS = ['sample_index', 'time', 'event', 'rep', 'class', 'vr_time']
+MOVEMENT_EVENT = 'movement'
+DTYPE = 'float32'
+FLUSH_PERIOD = 0.1          # seconds between flushes of the EMG stream to disk
+TRANSITION_TIME = 1         # seconds at the start of each movement excluded from training windows
+
+
+def is_continuous_session(folder):
+    return os.path.exists(os.path.join(folder, STREAM_FILENAME))
+
+
+class ContinuousRecorder:
+    """
+    Receives the EMG stream on port, forwards every packet unchanged to output_port and appends its samples to an
+    append-only binary stream on a background thread. Events (e.g. MovementInfo from the VR app) are recorded against
+    the number of samples received so far. Start the recorder before the streams so it sees their first packet.
+    """
+    def __init__(self, output_folder, num_channels, sampling_rate, ip = IP, port = RECORDING_PORT, output_port = MERGED_PORT):
+        self.output_folder = output_folder
+        self.num_channels = num_channels
+        self.sampling_rate = sampling_rate
+        self.ip = ip
+        self.port = port
+        self.output_port = output_port
+        self.num_samples = 0
+        self.lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        header = {
+            'num_channels': self.num_channels,
+            'sampling_rate': self.sampling_rate,
+            'dtype': DTYPE,
+            'created': round(time.time() * 1000)
+        }
+        with open(os.path.join(self.output_folder, HEADER_FILENAME), 'w') as f:
+            json.dump(header, f)
+        self.stream_file = open(os.path.join(self.output_folder, STREAM_FILENAME), 'ab')
+        labels_path = os.path.join(self.output_folder, LABELS_FILENAME)
+        new_labels = not os.path.exists(labels_path)
+        self.labels_file = open(labels_path, 'a', newline='')
+        self.labels_writer = csv.writer(self.labels_file)
+        if new_labels:
+            self.labels_writer.writerow(LABEL_COLUMNS)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((self.ip, self.port))
+        self.sock.settimeout(FLUSH_PERIOD)
+        self.out_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        last_flush = time.perf_counter()
+        while self.running:
+            try:
+                data, _ = self.sock.recvfrom(PACKET_SIZE)
+            except socket.timeout:
+                data = None
+            if data is not None:
+                # The OnlineDataHandler (and any live classifier) shouldn't wait on the disk write
+                self.out_sock.sendto(data, (self.ip, self.output_port))
+                self.write(pickle.loads(data))
+            if time.perf_counter() - last_flush >= FLUSH_PERIOD:
+                with self.lock:
+                    self.stream_file.flush()
+                last_flush = time.perf_counter()
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=DTYPE).reshape(-1, self.num_channels)
+        with self.lock:
+            self.stream_file.write(samples.tobytes())
+            self.num_samples += len(samples)
+
+    def mark(self, event, rep = -1, class_idx = -1, vr_time = -1):
+        with self.lock:
+            self.labels_writer.writerow([self.num_samples, time.time(), event, rep, class_idx, vr_time])
+            self.labels_file.flush()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+        self.sock.close()
+        self.out_sock.close()
+        self.stream_file.close()
+        self.labels_file.close()
+
+
+def read_header(folder):
+    with open(os.path.join(folder, HEADER_FILENAME), 'r') as f:
+        return json.load(f)
+
+
+def read_stream(folder):
+    """Memory-map the session's EMG stream as a (samples, channels) array."""
+    header = read_header(folder)
+    data = np.memmap(os.path.join(folder, STREAM_FILENAME), dtype=header['dtype'], mode='r')
+    return data.reshape(-1, header['num_channels']), header
+
+
+def read_labels(folder):
+    with open(os.path.join(folder, LABELS_FILENAME), 'r', newline='') as f:
+        return [row for row in csv.DictReader(f)]
+
+
+def get_segments(labels, num_samples, segment_length):
+    """Return (start, end, rep, class) for each movement: from its event until the next event or segment_length samples."""
+    events = [(int(row['sample_index']), row) for row in labels]
+    segments = []
+    for idx, (start, row) in enumerate(events):
+        if row['event'] != MOVEMENT_EVENT:
+            continue
+        next_event = events[idx + 1][0] if idx + 1 < len(events) else num_samples
+        end = min(next_event, start + segment_length, num_samples)
+        segments.append((start, end, int(row['rep']), int(row['class'])))
+    return segments
+
+
+def parse_continuous(folder, window_size, window_increment, reps = None, rep_time = REP_TIME, transition_time = TRANSITION_TIME):
+    """
+    Window a continuous session. Returns (windows, metadata) like libemg's OfflineDataHandler.parse_windows, where windows
+    is (windows, channels, window_size) and metadata has 'classes' and 'reps'. Windows overlapping the first transition_time
+    seconds of a movement are excluded.
+    """
+    from classification import get_windows
+    data, header = read_stream(folder)
+    sampling_rate = header['sampling_rate']
+    segments = get_segments(read_labels(folder), len(data), int(rep_time * sampling_rate))
+    windows = []
+    classes = []
+    rep_values = []
+    for start, end, rep, class_idx in segments:
+        if reps is not None and rep not in reps:
+            continue
+        start += int(transition_time * sampling_rate)
+        if end - start < window_size:
+            continue
+        segment_windows = get_windows(data[start:end], window_size, window_increment)
+        count('bytes_read', (end - start) * data.shape[1] * data.itemsize)
+        windows.append(segment_windows)
+        classes.append(np.full(len(segment_windows), class_idx))
+        rep_values.append(np.full(len(segment_windows), rep))
+    if len(windows) == 0:
+        return np.zeros((0, header['num_channels'], window_size), dtype=header['dtype']), {'classes': np.zeros(0, dtype=int), 'reps': np.zeros(0, dtype=int)}
+    metadata = {
+        'classes': np.concatenate(classes),
+        'reps': np.concatenate(rep_values)
+    }
+    return np.concatenate(windows), metadata
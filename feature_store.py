@@ -0,0 +1,68 @@
+"""
+Shared store of per-subject features so that every evaluation (within-subject CV, cross-method and cross-subject transfer)
+reuses one feature extraction per subject folder. Features are kept in memory and, optionally, cached on disk.
+Date created: 2026-10-19
+"""
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from catalog import get_catalog, hash_file
+from training import NUM_REPS, REP_TIME
+from continuous import LABELS_FILENAME, TRANSITION_TIME
+from classification import parse_data, extract_features, WINDOW_SIZE, WINDOW_INCREMENT, FEATURES
+
+
+FEATURE_CACHE_FOLDER = os.path.join('data', '.features')
+
+
+def folder_signature(data_folder):
+    # Changes whenever the folder's data (per the catalog's content hashes / stream sizes, plus a continuous session's
+    # labels), the windowing/labelling constants or the feature configuration change
+    catalog = get_catalog(data_folder)
+    entries = [(key, entry.get('hash', entry['size'])) for entry_type in ('rep', 'continuous') for key, entry in catalog.select(folder=data_folder, entry_type=entry_type)]
+    labels_path = os.path.join(data_folder, LABELS_FILENAME)
+    if os.path.exists(labels_path):
+        entries.append((LABELS_FILENAME, hash_file(labels_path)))
+    config = [WINDOW_SIZE, WINDOW_INCREMENT, FEATURES, NUM_REPS, REP_TIME, TRANSITION_TIME]
+    return hashlib.sha1(json.dumps([os.path.normpath(data_folder), entries, config]).encode('utf-8')).hexdigest()
+
+
+def select(features, mask):
+    return {name: values[mask] for name, values in features.items()}
+
+
+def concatenate(feature_sets):
+    return {name: np.concatenate([features[name] for features in feature_sets]) for name in feature_sets[0].keys()}
+
+
+class FeatureStore:
+    def __init__(self, cache_folder = FEATURE_CACHE_FOLDER):
+        self.cache_folder = cache_folder
+        self.subjects = {}
+
+    def get(self, data_folder):
+        """Return (features, classes, reps) for all windows in data_folder, extracting features only on first use."""
+        key = os.path.normpath(data_folder)
+        if key not in self.subjects:
+            self.subjects[key] = self._load(data_folder)
+        return self.subjects[key]
+
+    def _load(self, data_folder):
+        cache_path = None
+        if self.cache_folder is not None:
+            cache_path = os.path.join(self.cache_folder, folder_signature(data_folder) + '.npz')
+            if os.path.exists(cache_path):
+                with np.load(cache_path) as cached:
+                    features = {name[len('feature_'):]: cached[name] for name in cached.files if name.startswith('feature_')}
+                    return features, cached['classes'], cached['reps']
+        windows, metadata = parse_data(data_folder)
+        features = extract_features(windows)
+        classes = np.asarray(metadata['classes'])
+        reps = np.asarray(metadata['reps'])
+        if cache_path is not None:
+            os.makedirs(self.cache_folder, exist_ok=True)
+            np.savez(cache_path, classes=classes, reps=reps, **{f'feature_{name}': values for name, values in features.items()})
+        return features, classes, reps
@@ -1,12 +1,12 @@
 import pygame
 import math
 import time
-import pickle
 import os
 import socket
 
-from classification import create_offline_classifier, create_online_classifier
-from training import check_for_directory, OUTPUT_FOLDER
+import session_log
+from classification import create_offline_classifier, create_online_classifier, load_classifier, CLASSIFIER, FEATURES, WINDOW_SIZE, WINDOW_INCREMENT
+from training import check_for_directory, OUTPUT_FOLDER, SUBJECT_ID, TRAINING_METHOD
 
 
 class FittsLawTest:
@@ -23,7 +23,7 @@ class FittsLawTest:
     pages={87380-87397},
     doi={10.1109/ACCESS.2023.3304544}}
     """
-    def __init__(self, num_circles=30, num_trials=15, savefile="out.pkl", logging=True, fps=60, width=1250, height=750):
+    def __init__(self, num_circles=30, num_trials=15, savefile="out", logging=True, fps=60, width=1250, height=750):
         pygame.init()
         self.font = pygame.font.SysFont('helvetica', 40)
         self.screen = pygame.display.set_mode([width, height])
@@ -214,9 +214,16 @@ class FittsLawTest:
 
     def save_log(self):
         check_for_directory(OUTPUT_FOLDER, overwriting=False)
+        classifier = {
+            'name': CLASSIFIER,
+            'features': FEATURES,
+            'window_size': WINDOW_SIZE,
+            'window_increment': WINDOW_INCREMENT
+        }
+        header = session_log.make_header(SUBJECT_ID, TRAINING_METHOD, classifier=classifier, fps=self.fps,
+                                         num_circles=self.num_of_circles, num_trials=self.max_trial)
         # Adding timestamp
-        with open(f'{OUTPUT_FOLDER}/'+ str(round(time.time() * 1000)) + "_" + self.savefile, 'wb') as f:
-            pickle.dump(self.log_dictionary, f)
+        session_log.write_session(OUTPUT_FOLDER, header, self.log_dictionary, name=f"{header['created']}_{self.savefile}")
 
     def run(self):
         while not self.done:
@@ -226,10 +233,13 @@ class FittsLawTest:
             self.clock.tick(self.fps)
         pygame.quit()
 
-def main():
+def main(model_path = None):
     check_for_directory(OUTPUT_FOLDER, overwriting=False)
     # Create online EMG classifier
-    offline_classifier = create_offline_classifier(OUTPUT_FOLDER)
+    if model_path is None:
+        offline_classifier = create_offline_classifier(OUTPUT_FOLDER)
+    else:
+        offline_classifier = load_classifier(model_path)
     online_classifier = create_online_classifier(offline_classifier)
     online_classifier.run(block=False)  # don't block main thread
 
@@ -0,0 +1,123 @@
+"""
+Streaming classification metrics that never hold raw predictions in memory.
+Date created: 2026-10-19
+"""
+import numpy as np
+
+
+NUM_BOOTSTRAPS = 200
+# Limit on (bootstraps x samples) weights drawn at once so very long recordings are processed in chunks
+BOOTSTRAP_CHUNK = 2 ** 22
+
+
+class StreamingMetrics:
+    """
+    Accumulates a confusion matrix (and Poisson bootstrap replicates of it) from batches of labels and predictions.
+    Memory is O(num_bootstraps * num_classes^2) regardless of how many samples are seen. Accumulators from different
+    folds or worker processes can be combined with merge(), and whole subjects added as resampling units with add_unit() - they
+    are plain numpy arrays, so they pickle cheaply.
+    """
+    def __init__(self, num_classes, num_bootstraps = NUM_BOOTSTRAPS, seed = None):
+        self.num_classes = num_classes
+        self.num_bootstraps = num_bootstraps
+        self.rng = np.random.default_rng(seed)
+        self.counts = np.zeros((num_classes, num_classes), dtype=np.int64)
+        self.bootstrap_counts = np.zeros((num_bootstraps, num_classes, num_classes), dtype=np.int64)
+
+    def update(self, true_labels, predictions, groups = None):
+        """
+        Add a batch of labels and predictions. By default the bootstrap resamples individual samples. With groups, samples
+        sharing a group (e.g. windows of the same rep file, which overlap and are strongly correlated) are resampled as one
+        unit. A group should not be split across several update() calls.
+        """
+        true_labels = np.asarray(true_labels, dtype=np.int64).reshape(-1)
+        predictions = np.asarray(predictions, dtype=np.int64).reshape(-1)
+        cells = true_labels * self.num_classes + predictions
+        num_cells = self.num_classes ** 2
+        self.counts += np.bincount(cells, minlength=num_cells).reshape(self.num_classes, self.num_classes)
+        if self.num_bootstraps == 0:
+            return
+        if groups is not None:
+            _, units = np.unique(np.asarray(groups).reshape(-1), return_inverse=True)
+            num_units = units.max() + 1 if len(units) else 0
+            unit_counts = np.bincount(units * num_cells + cells, minlength=num_units * num_cells).reshape(num_units, num_cells)
+            weights = self.rng.poisson(1.0, size=(self.num_bootstraps, num_units))
+            self.bootstrap_counts += (weights @ unit_counts).reshape(self.bootstrap_counts.shape)
+            return
+        # Poisson(1) weights approximate resampling with replacement and, unlike a classic bootstrap, can be drawn
+        # one batch at a time without knowing the total number of samples
+        chunk_size = max(1, BOOTSTRAP_CHUNK // self.num_bootstraps)
+        offsets = (np.arange(self.num_bootstraps) * num_cells).reshape(-1, 1)
+        for start in range(0, len(cells), chunk_size):
+            chunk = cells[start:start + chunk_size]
+            weights = self.rng.poisson(1.0, size=(self.num_bootstraps, len(chunk)))
+            replicate_cells = (offsets + chunk).reshape(-1)
+            self.bootstrap_counts += np.bincount(replicate_cells, weights=weights.reshape(-1), minlength=self.num_bootstraps * num_cells).astype(np.int64).reshape(self.bootstrap_counts.shape)
+
+    def merge(self, other):
+        self._check_compatible(other)
+        self.counts += other.counts
+        self.bootstrap_counts += other.bootstrap_counts
+        return self
+
+    def add_unit(self, other):
+        """
+        Add other's samples as a single resampling unit (e.g. a whole subject), so confidence intervals reflect variation
+        between units rather than between their samples.
+        """
+        self._check_compatible(other)
+        self.counts += other.counts
+        weights = self.rng.poisson(1.0, size=self.num_bootstraps)
+        self.bootstrap_counts += weights.reshape(-1, 1, 1) * other.counts
+        return self
+
+    def _check_compatible(self, other):
+        if other.num_classes != self.num_classes or other.num_bootstraps != self.num_bootstraps:
+            raise ValueError('Can only combine StreamingMetrics with the same number of classes and bootstraps.')
+
+    @property
+    def num_samples(self):
+        return int(self.counts.sum())
+
+    def accuracy(self):
+        return float(_accuracy(self.counts))
+
+    def confusion_matrix(self, normalize = True):
+        if not normalize:
+            return self.counts.copy()
+        return _safe_divide(self.counts, self.counts.sum(axis=-1, keepdims=True))
+
+    def precision(self):
+        return _precision(self.counts)
+
+    def recall(self):
+        return _recall(self.counts)
+
+    def confidence_interval(self, metric = 'accuracy', alpha = 0.05):
+        """Percentile bootstrap (lower, upper) bounds for 'accuracy', 'precision' or 'recall' (per class)."""
+        if self.num_bootstraps == 0:
+            raise ValueError('Confidence intervals require num_bootstraps > 0.')
+        metric_functions = {'accuracy': _accuracy, 'precision': _precision, 'recall': _recall}
+        if metric not in metric_functions:
+            raise ValueError(f"Unrecognized metric {metric}. Valid options are {list(metric_functions.keys())}.")
+        replicates = metric_functions[metric](self.bootstrap_counts)
+        lower, upper = np.nanpercentile(replicates, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=0)
+        return lower, upper
+
+
+def _safe_divide(numerator, denominator):
+    numerator = numerator.astype(np.float64)
+    return np.divide(numerator, denominator, out=np.full(numerator.shape, np.nan), where=denominator != 0)
+
+
+def _accuracy(counts):
+    # counts can be a single (classes, classes) matrix or a stack of bootstrap replicates
+    return _safe_divide(np.trace(counts, axis1=-2, axis2=-1), counts.sum(axis=(-2, -1)))
+
+
+def _precision(counts):
+    return _safe_divide(np.diagonal(counts, axis1=-2, axis2=-1), counts.sum(axis=-2))
+
+
+def _recall(counts):
+    return _safe_divide(np.diagonal(counts, axis1=-2, axis2=-1), counts.sum(axis=-1))
@@ -0,0 +1,182 @@
+"""
+Live signal-quality and throughput monitor.
+The monitor sits between the producers and consumers of the raw EMG stream and the prediction stream as a
+transparent UDP tap: each packet is forwarded unchanged and then folded into ring-buffer statistics. Per-channel
+RMS, saturation, dropout, sample-rate drift and prediction rate are served as JSON over HTTP (GET /stats) so the
+vr-training-ui-app (or `python cli.py monitor`) can poll them.
+Date created: 2026-10-19
+"""
+import json
+import time
+import pickle
+import socket
+import selectors
+import threading
+import multiprocessing
+
+import numpy as np
+
+from network import IP, PACKET_SIZE, EMG_PORT, PREDICTION_PORT, PREDICTION_OUTPUT_PORT
+
+
+MONITOR_ENABLED = False
+HTTP_PORT = 8765
+WINDOW_TIME = 1             # seconds of EMG used for RMS / saturation / flat-channel detection
+RATE_WINDOW_TIME = 5        # seconds used to estimate sample and prediction rates
+SATURATION_LEVEL = 127      # Myo samples are int8
+DROPOUT_TIMEOUT = 0.5       # seconds without EMG before the stream is reported as dropped
+
+
+class RingBuffer:
+    """Fixed-size (capacity, width) numpy ring buffer. extend() writes whole batches with at most two slice assignments."""
+    def __init__(self, capacity, width = 1, dtype = np.float64):
+        self.data = np.zeros((capacity, width), dtype=dtype)
+        self.capacity = capacity
+        self.index = 0
+        self.size = 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype).reshape(-1, self.data.shape[1])[-self.capacity:]
+        num_values = len(values)
+        first = min(num_values, self.capacity - self.index)
+        self.data[self.index:self.index + first] = values[:first]
+        self.data[:num_values - first] = values[first:]
+        self.index = (self.index + num_values) % self.capacity
+        self.size = min(self.size + num_values, self.capacity)
+
+    def values(self):
+        # Oldest to newest
+        if self.size < self.capacity:
+            return self.data[:self.size]
+        return np.roll(self.data, -self.index, axis=0)
+
+
+class SignalMonitor:
+    def __init__(self, num_channels, sampling_rate, saturation_level = SATURATION_LEVEL):
+        self.num_channels = num_channels
+        self.sampling_rate = sampling_rate
+        self.saturation_level = saturation_level
+        self.emg = RingBuffer(int(WINDOW_TIME * sampling_rate), num_channels)
+        # (arrival time, number of samples) per packet, for rate estimation
+        self.packets = RingBuffer(4096, 2)
+        self.predictions = RingBuffer(4096, 2)
+        self.total_samples = 0
+        self.total_predictions = 0
+        self.lock = threading.Lock()
+
+    def add_emg(self, samples, now = None):
+        samples = np.asarray(samples, dtype=np.float64).reshape(-1, self.num_channels)
+        now = time.perf_counter() if now is None else now
+        with self.lock:
+            self.emg.extend(samples)
+            self.packets.extend([now, len(samples)])
+            self.total_samples += len(samples)
+
+    def add_prediction(self, label, now = None):
+        now = time.perf_counter() if now is None else now
+        with self.lock:
+            self.predictions.extend([now, label])
+            self.total_predictions += 1
+
+    def stats(self, now = None):
+        now = time.perf_counter() if now is None else now
+        with self.lock:
+            emg = self.emg.values().copy()
+            packets = self.packets.values().copy()
+            predictions = self.predictions.values().copy()
+            total_samples = self.total_samples
+            total_predictions = self.total_predictions
+        stats = {'total_samples': total_samples, 'total_predictions': total_predictions}
+        if len(emg):
+            stats['rms'] = np.sqrt(np.mean(emg ** 2, axis=0)).tolist()
+            stats['saturation'] = np.mean(np.abs(emg) >= self.saturation_level, axis=0).tolist()
+            stats['flat_channels'] = np.flatnonzero(np.ptp(emg, axis=0) == 0).tolist()
+        last_emg = packets[-1, 0] if len(packets) else None
+        stats['dropout'] = bool(last_emg is None or now - last_emg > DROPOUT_TIMEOUT)
+        stats['sample_rate'] = _rate(packets, now)
+        stats['sample_rate_drift_ppm'] = (stats['sample_rate'] / self.sampling_rate - 1) * 1e6 if stats['sample_rate'] is not None else None
+        stats['prediction_rate'] = _rate(np.column_stack((predictions[:, 0], np.ones(len(predictions)))), now)
+        stats['last_prediction'] = float(predictions[-1, 1]) if len(predictions) and not np.isnan(predictions[-1, 1]) else None
+        return stats
+
+
+def _rate(events, now):
+    # events is (time, count) per packet; rate over the span of packets received in the last RATE_WINDOW_TIME seconds
+    recent = events[events[:, 0] >= now - RATE_WINDOW_TIME]
+    if len(recent) < 2:
+        return None
+    span = recent[-1, 0] - recent[0, 0]
+    # The first packet's samples arrived before the window started, so they are excluded from the count
+    return float(recent[1:, 1].sum() / span) if span > 0 else None
+
+
+def parse_prediction(data):
+    # libemg sends '<prediction> ...' (or probabilities) as text; the first value is enough to track rate and class
+    try:
+        return float(data.decode('utf-8').split(' ')[0])
+    except ValueError:
+        return np.nan
+
+
+def make_handler(signal_monitor):
+    from http.server import BaseHTTPRequestHandler
+    class StatsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/stats':
+                self.send_error(404)
+                return
+            body = json.dumps(signal_monitor.stats()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')    # polled from the React app
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+    return StatsHandler
+
+
+def run_monitor(num_channels, sampling_rate, emg_output_port, ip = IP, http_port = HTTP_PORT):
+    """Forward EMG and prediction packets to their consumers while collecting statistics. Runs until killed."""
+    from http.server import ThreadingHTTPServer
+    signal_monitor = SignalMonitor(num_channels, sampling_rate)
+    server = ThreadingHTTPServer((ip, http_port), make_handler(signal_monitor))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    selector = selectors.DefaultSelector()
+    routes = {EMG_PORT: emg_output_port, PREDICTION_PORT: PREDICTION_OUTPUT_PORT}
+    for in_port in routes.keys():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((ip, in_port))
+        selector.register(sock, selectors.EVENT_READ, in_port)
+    out_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    while True:
+        for key, _ in selector.select():
+            data, _ = key.fileobj.recvfrom(PACKET_SIZE)
+            # Forward before doing any work so the monitor adds as little latency as possible
+            out_sock.sendto(data, (ip, routes[key.data]))
+            if key.data == EMG_PORT:
+                signal_monitor.add_emg(pickle.loads(data))
+            else:
+                signal_monitor.add_prediction(parse_prediction(data))
+
+
+def start_monitor(num_channels, sampling_rate, emg_output_port):
+    process = multiprocessing.Process(target=run_monitor, args=(num_channels, sampling_rate, emg_output_port), daemon=True)
+    process.start()
+    return process
+
+
+def poll(url = f'http://{IP}:{HTTP_PORT}/stats', period = 1):
+    """Print a one-line summary of the monitor's statistics every period seconds."""
+    from urllib.request import urlopen
+    while True:
+        with urlopen(url) as response:
+            stats = json.loads(response.read())
+        rms = ' '.join(f'{value:5.1f}' for value in stats.get('rms', []))
+        sample_rate = f"{stats['sample_rate']:.1f} Hz" if stats['sample_rate'] is not None else '-'
+        prediction_rate = f"{stats['prediction_rate']:.1f} Hz" if stats['prediction_rate'] is not None else '-'
+        print(f"EMG {sample_rate} | predictions {prediction_rate} | RMS {rms} | flat {stats.get('flat_channels', [])} | dropout {stats['dropout']}")
+        time.sleep(period)
@@ -0,0 +1,13 @@
+"""
+Addresses of the local UDP pipeline, shared by streams.py, monitor.py and continuous.py so their ports can't drift apart.
+EMG flows streams -> EMG_PORT (monitor, optional) -> RECORDING_PORT (recorder, optional) -> MERGED_PORT (libemg),
+and predictions flow classifier -> PREDICTION_PORT (monitor, optional) -> PREDICTION_OUTPUT_PORT (isofitts).
+Date created: 2026-10-19
+"""
+IP = '127.0.0.1'
+PACKET_SIZE = 1024 * 64
+MERGED_PORT = 12345             # libemg's OnlineDataHandler default
+EMG_PORT = 12360                # streams send here when monitoring
+RECORDING_PORT = 12362          # streams (or the monitor) send here while recording continuously
+PREDICTION_PORT = 12361         # classifier sends here when monitoring
+PREDICTION_OUTPUT_PORT = 12346  # libemg's OnlineEMGClassifier default (read by isofitts)
@@ -0,0 +1,118 @@
+"""
+Opt-in stage timers and counters for the offline pipeline.
+Stages are timed inclusively (a stage's time includes any stages it calls) and attributed to the current subject.
+When profiling is disabled (the default), profiled functions only pay for a flag check and timer()/count() return
+immediately.
+Date created: 2026-10-19
+"""
+import csv
+import time
+import cProfile
+import functools
+import contextlib
+
+
+ENABLED = False
+GLOBAL_SUBJECT = 'all'
+
+_NULL_CONTEXT = contextlib.nullcontext()
+_stages = {}        # (subject, stage) -> [calls, seconds]
+_counters = {}      # (subject, counter) -> total
+_current_subject = GLOBAL_SUBJECT
+_profiler = None
+
+
+def enable(use_cprofile = False):
+    global ENABLED, _profiler
+    ENABLED = True
+    _stages.clear()
+    _counters.clear()
+    if use_cprofile:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+    if _profiler is not None:
+        _profiler.disable()
+
+
+@contextlib.contextmanager
+def _timer(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage = _stages.setdefault((_current_subject, name), [0, 0.0])
+        stage[0] += 1
+        stage[1] += time.perf_counter() - start
+
+
+def timer(name):
+    """Context manager timing the enclosed block as stage name."""
+    if not ENABLED:
+        return _NULL_CONTEXT
+    return _timer(name)
+
+
+def profiled(name):
+    """Decorator timing every call of the function as stage name."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value = 1):
+    if ENABLED:
+        key = (_current_subject, name)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+@contextlib.contextmanager
+def subject(name):
+    """Attribute stages and counters inside the block to subject name."""
+    global _current_subject
+    previous = _current_subject
+    _current_subject = name
+    try:
+        yield
+    finally:
+        _current_subject = previous
+
+
+def report():
+    """Return (subject, kind, name, calls, seconds) rows sorted by subject and descending time; counters have kind 'counter'."""
+    rows = [(subject_name, 'stage', stage, calls, seconds) for (subject_name, stage), (calls, seconds) in _stages.items()]
+    rows.sort(key=lambda row: (row[0], -row[4]))
+    rows.extend(sorted((subject_name, 'counter', counter, total, None) for (subject_name, counter), total in _counters.items()))
+    return rows
+
+
+def print_report():
+    current_subject = None
+    for subject_name, kind, name, calls, seconds in report():
+        if subject_name != current_subject:
+            print(subject_name)
+            current_subject = subject_name
+        if kind == 'stage':
+            print(f'    {name:<30} {calls:>8} calls {seconds:10.3f} s')
+        else:
+            print(f'    {name:<30} {calls:>14}')
+
+
+def write_report(path, cprofile_path = None):
+    """Write the stage/counter breakdown as CSV and, if profiling with cProfile, a pstats dump (e.g. for snakeviz or flameprof)."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['subject', 'kind', 'name', 'calls_or_total', 'seconds'])
+        writer.writerows(report())
+    if cprofile_path is not None and _profiler is not None:
+        _profiler.dump_stats(cprofile_path)
@@ -5,83 +5,171 @@ Date created: 2023-12-01
 """
 import os
 import math
-import pickle
+import argparse
 
 import numpy as np
-import libemg
-from classification import parse_data, extract_features, CLASSIFIER, LABEL_NAMES
-from training import SGT_FOLDER, VR_FOLDER, DATA_FOLDER
-from sklearn.model_selection import KFold
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
+import session_log
+from metrics import StreamingMetrics
+import feature_store
+import profiling
+from profiling import profiled, count
+from classification import CLASSIFIER, LABEL_NAMES
+from catalog import get_catalog
+from training import SGT_FOLDER, VR_FOLDER, DATA_FOLDER, SGT, VR
 
 
+FEATURE_STORE = feature_store.FeatureStore()
+BOOTSTRAP_SEED = 0
+# Every accumulator gets its own child seed, so results are reproducible and bootstrap replicates independent across accumulators
+_bootstrap_seeds = np.random.SeedSequence(BOOTSTRAP_SEED)
+
+
+def new_metrics():
+    return StreamingMetrics(len(LABEL_NAMES), seed=_bootstrap_seeds.spawn(1)[0])
+
+
+def rep_file_groups(classes, reps):
+    # One bootstrap unit per (rep, class) recording: its windows overlap, so they are not independent samples
+    return np.asarray(reps) * len(LABEL_NAMES) + np.asarray(classes)
+
+
+@profiled('fit_and_score')
+def fit_and_score(train_features, train_labels, test_sets):
+    """
+    Fit one classifier and score it on every (features, labels, groups) test set, where groups are the bootstrap resampling
+    units of the test windows. Returns one StreamingMetrics per test set.
+    """
+    import libemg
+    classifier = libemg.emg_classifier.EMGClassifier()
+    classifier.fit(CLASSIFIER, {'training_features': train_features, 'training_labels': train_labels})
+    count('fits')
+    results = []
+    for test_features, test_labels, test_groups in test_sets:
+        predictions, _ = classifier.run(test_features)
+        metrics = new_metrics()
+        metrics.update(test_labels, predictions, groups=test_groups)
+        results.append(metrics)
+    return results
+
+
+@profiled('cross_validation')
 def cross_validation(data_folder):
+    from sklearn.model_selection import KFold
     if not os.path.isdir(data_folder):
         print(f'Skipping {data_folder} because it is not a directory.')
         return None
     n_splits = 5
     kf = KFold(n_splits=n_splits)
     reps = np.arange(n_splits)
-    om = libemg.offline_metrics.OfflineMetrics()
-    predictions = []
-    true_labels = []
+    features, classes, window_reps = FEATURE_STORE.get(data_folder)
+    subject_metrics = new_metrics()
     for train_index, test_index in kf.split(reps):
-        # Parse data
-        train_reps = reps[train_index]
-        test_reps = reps[test_index]
-        train_windows, train_metadata = parse_data(data_folder, reps=list(train_reps))
-        test_windows, test_metadata = parse_data(data_folder, reps=list(test_reps))
-        
-        # Extract features
-        data_set = {
-            'training_features': extract_features(train_windows),
-            'training_labels': train_metadata['classes']
-        }
-        test_features = extract_features(test_windows)
-        test_labels = test_metadata['classes']
-
-        # Train model
-        classifier = libemg.emg_classifier.EMGClassifier()
-        classifier.fit(CLASSIFIER, data_set.copy())
-        fold_predictions, _ = classifier.run(test_features)
-        predictions.append(fold_predictions)
-        true_labels.append(test_labels)
-
-    predictions = np.concatenate(predictions)
-    true_labels = np.concatenate(true_labels)
-    metrics = om.extract_offline_metrics(['CA', 'CONF_MAT'], true_labels, predictions)
-    return metrics['CA'], metrics['CONF_MAT']
+        train_mask = np.isin(window_reps, reps[train_index])
+        test_mask = np.isin(window_reps, reps[test_index])
+        test_set = (feature_store.select(features, test_mask), classes[test_mask], rep_file_groups(classes[test_mask], window_reps[test_mask]))
+        fold_metrics, = fit_and_score(feature_store.select(features, train_mask), classes[train_mask], [test_set])
+        subject_metrics.merge(fold_metrics)
+
+    return subject_metrics
+
+
+@profiled('transfer_matrix')
+def transfer_matrix(subject_folders):
+    """
+    Train on each subject folder and test on every other one (e.g. all SGT and VR folders for cross-method and cross-subject
+    transfer). Each folder's features come from the shared store and each classifier is fit once, so N folders cost N fits
+    and N feature extractions rather than N^2. Returns an (N, N) accuracy matrix indexed [train, test].
+    """
+    accuracies = np.full((len(subject_folders), len(subject_folders)), np.nan)
+    data = [FEATURE_STORE.get(folder) for folder in subject_folders]
+    for train_idx, (features, classes, _) in enumerate(data):
+        test_indices = [idx for idx in range(len(subject_folders)) if idx != train_idx]
+        test_sets = [(data[idx][0], data[idx][1], rep_file_groups(data[idx][1], data[idx][2])) for idx in test_indices]
+        for test_idx, metrics in zip(test_indices, fit_and_score(features, classes, test_sets)):
+            accuracies[train_idx, test_idx] = metrics.accuracy()
+    return accuracies
+
+
+@profiled('leave_one_subject_out')
+def leave_one_subject_out(subject_folders):
+    """Train on all but one subject folder and test on the held-out one. Returns one StreamingMetrics per folder."""
+    data = [FEATURE_STORE.get(folder) for folder in subject_folders]
+    results = []
+    for test_idx, (test_features, test_classes, test_reps) in enumerate(data):
+        train_data = [data[idx] for idx in range(len(data)) if idx != test_idx]
+        train_features = feature_store.concatenate([features for features, _, _ in train_data])
+        train_classes = np.concatenate([classes for _, classes, _ in train_data])
+        subject_metrics, = fit_and_score(train_features, train_classes, [(test_features, test_classes, rep_file_groups(test_classes, test_reps))])
+        results.append(subject_metrics)
+    return results
+
+
+def calculate_transfer_metrics(method_folders):
+    """Cross-method/cross-subject transfer and leave-one-subject-out accuracies for {method: method_folder} in long format."""
+    folders = [(method, folder) for method, method_folder in method_folders.items() for folder in get_catalog(method_folder).subject_folders(method_folder)]
+    subject_names = [os.path.basename(os.path.normpath(folder)) for _, folder in folders]
+    accuracies = transfer_matrix([folder for _, folder in folders])
+    rows = []
+    for train_idx, (train_method, _) in enumerate(folders):
+        for test_idx, (test_method, _) in enumerate(folders):
+            if train_idx != test_idx:
+                rows.append(['transfer', train_method, subject_names[train_idx], test_method, subject_names[test_idx], accuracies[train_idx, test_idx]])
+    for method, method_folder in method_folders.items():
+        subject_folders = get_catalog(method_folder).subject_folders(method_folder)
+        if len(subject_folders) < 2:
+            continue
+        for folder, subject_metrics in zip(subject_folders, leave_one_subject_out(subject_folders)):
+            subject = os.path.basename(os.path.normpath(folder))
+            rows.append(['loso', method, 'others', method, subject, subject_metrics.accuracy()])
+    return rows
+
 
 def plot_confusion_matrix(confusion_matrix, title = ''):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import pandas as pd
     df = pd.DataFrame(confusion_matrix, index=LABEL_NAMES, columns=LABEL_NAMES)
     sns.heatmap(df, annot=True, fmt='.2f')
     plt.title(title)
 
 
 def calculate_offline_metrics(data_folder):
-    subject_folders = os.listdir(data_folder)
+    subject_folders = get_catalog(data_folder).subject_folders(data_folder)
     accuracies = []
-    confusion_matrices = []
-    for subject_folder in subject_folders:
-        folder_path = os.path.join(data_folder, subject_folder, '')
-        result = cross_validation(folder_path)
-        if result is not None:
-            subject_accuracy, subject_confusion_matrix = result
-            accuracies.append(subject_accuracy)
-            confusion_matrices.append(subject_confusion_matrix)
+    confusion_matrix_sum = np.zeros((len(LABEL_NAMES), len(LABEL_NAMES)))
+    subject_metrics_list = []
+    for folder_path in subject_folders:
+        with profiling.subject(folder_path):
+            subject_metrics = cross_validation(folder_path)
+        if subject_metrics is not None:
+            accuracies.append(subject_metrics.accuracy())
+            confusion_matrix_sum += subject_metrics.confusion_matrix(normalize=False)
+            subject_metrics_list.append(subject_metrics)
     accuracies = np.array(accuracies).reshape(-1, 1)
-    confusion_matrices = np.array(confusion_matrices)
     mean_accuracy = accuracies.mean()
-    mean_confusion_matrix = confusion_matrices.mean(axis=0)
+    mean_confusion_matrix = confusion_matrix_sum / len(accuracies)
+
+    # Subjects are the resampling unit for the cohort's confidence interval. Resampling a single subject gives a
+    # zero-width interval, so with fewer than 2 subjects fall back to that subject's rep-file bootstrap
+    cohort_metrics = new_metrics()
+    if len(subject_metrics_list) >= 2:
+        unit = 'subjects'
+        for subject_metrics in subject_metrics_list:
+            cohort_metrics.add_unit(subject_metrics)
+    else:
+        unit = 'rep files'
+        for subject_metrics in subject_metrics_list:
+            cohort_metrics.merge(subject_metrics)
 
     # Display results
+    lower, upper = cohort_metrics.confidence_interval('accuracy')
     print(f'Mean accuracy: {mean_accuracy}')
+    print(f'Pooled accuracy: {cohort_metrics.accuracy()} (95% CI, resampling {unit}: {lower} - {upper})')
 
     return accuracies, mean_confusion_matrix
 
 
+@profiled('calculate_throughput')
 def calculate_throughput(subject_data):
     """Leveraged https://github.com/libemg/LibEMG_Isofitts_Showcase to inform online Fitts' metric calculation."""
     throughput = []
@@ -103,6 +191,7 @@ def calculate_throughput(subject_data):
     return np.mean(throughput)
 
 
+@profiled('calculate_efficiency')
 def calculate_efficiency(subject_data):
     """Leveraged https://github.com/libemg/LibEMG_Isofitts_Showcase to inform online Fitts' metric calculation."""
     efficiency = []
@@ -118,6 +207,7 @@ def calculate_efficiency(subject_data):
     
     return np.mean(efficiency)
 
+@profiled('calculate_overshoots')
 def calculate_overshoots(subject_data):
     """Leveraged https://github.com/libemg/LibEMG_Isofitts_Showcase to inform online Fitts' metric calculation."""
     def cursor_in_target(cursor, target):
@@ -140,32 +230,25 @@ def calculate_overshoots(subject_data):
     return overshoots
 
 
-def read_pickle_file(path):
-    with open(path, 'rb') as f:
-        data = pickle.load(f)
-    return data
-
-def calculate_online_metrics(data_folder):
-    def find_pickle_file(path):
-        try:
-            for filename in os.listdir(path):
-                if filename.endswith('.pkl'):
-                    return os.path.join(path, filename)
-        except NotADirectoryError:
-            pass
-        return None
+def calculate_online_metrics(data_folder, **filters):
+    """Calculate online metrics for each subject, averaging over all of a subject's sessions that match filters (e.g. num_circles=8)."""
+    method = os.path.basename(os.path.normpath(data_folder))
+    cohort_folder = os.path.dirname(os.path.normpath(data_folder))
+    columns = ['trial_number', 'goal_circle', 'global_clock', 'cursor_position']
+    subject_sessions = {}
+    with profiling.timer('load_sessions'):
+        for path, _ in session_log.query_sessions(cohort_folder, method=method, **filters):
+            subject_folder = os.path.basename(os.path.dirname(path))   # group by folder so rows line up with calculate_offline_metrics
+            subject_sessions.setdefault(subject_folder, []).append(session_log.read_session(path, columns=columns))
     throughputs = []
     efficiencies = []
     overshoots = []
-    subject_folders = os.listdir(data_folder)
-    for subject_folder in subject_folders:
-        folder_path = os.path.join(data_folder, subject_folder, '')
-        filename = find_pickle_file(folder_path)
-        if filename is not None:
-            log = read_pickle_file(filename)
-            throughputs.append(calculate_throughput(log))
-            efficiencies.append(calculate_efficiency(log))
-            overshoots.append(calculate_overshoots(log))
+    for subject_folder in sorted(subject_sessions.keys()):
+        logs = subject_sessions[subject_folder]
+        with profiling.subject(os.path.join(data_folder, subject_folder, '')):
+            throughputs.append(np.mean([calculate_throughput(log) for log in logs]))
+            efficiencies.append(np.mean([calculate_efficiency(log) for log in logs]))
+            overshoots.append(np.mean([calculate_overshoots(log) for log in logs]))
     throughputs = np.array(throughputs).reshape(-1, 1)
     efficiencies = np.array(efficiencies).reshape(-1, 1)
     overshoots = np.array(overshoots).reshape(-1, 1)
@@ -181,7 +264,11 @@ def combine_metrics(method, *args):
     return metrics
         
 
-def main():
+def main(profile_folder = None, use_cprofile = False):
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    if profile_folder is not None:
+        profiling.enable(use_cprofile=use_cprofile)
     sgt_offline_metrics = calculate_offline_metrics(SGT_FOLDER)
     sgt_online_metrics = calculate_online_metrics(SGT_FOLDER)
     sgt_metrics = combine_metrics('sgt', sgt_offline_metrics[0:1], sgt_online_metrics)
@@ -191,6 +278,17 @@ def main():
     vr_online_metrics = calculate_online_metrics(VR_FOLDER)
     vr_metrics = combine_metrics('vr', vr_offline_metrics[0:1], vr_online_metrics)
     
+    # Cross-method / cross-subject transfer (features are reused from the offline metrics above)
+    transfer_rows = calculate_transfer_metrics({SGT: SGT_FOLDER, VR: VR_FOLDER})
+
+    if profile_folder is not None:
+        # Stop before plotting so time spent looking at the figure isn't counted
+        profiling.disable()
+        os.makedirs(profile_folder, exist_ok=True)
+        profiling.write_report(os.path.join(profile_folder, 'stages.csv'),
+                               cprofile_path=os.path.join(profile_folder, 'results.prof') if use_cprofile else None)
+        profiling.print_report()
+
     # Show confusion matrices
     fig = plt.figure()
     plt.subplot(1, 2, 1)
@@ -209,7 +307,17 @@ def main():
     df = pd.DataFrame(all_metrics, columns=columns)
     df.to_csv(os.path.join(DATA_FOLDER, 'results.csv'))
 
+    # Cross-method / cross-subject transfer
+    columns = ['evaluation', 'train_method', 'train_subject', 'test_method', 'test_subject', 'accuracy']
+    df = pd.DataFrame(transfer_rows, columns=columns)
+    df.to_csv(os.path.join(DATA_FOLDER, 'transfer_results.csv'))
+
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Calculate offline and online metrics for the cohort.')
+    parser.add_argument('--profile', nargs='?', const='profile', default=None, metavar='FOLDER',
+                        help='Write a per-subject stage breakdown to FOLDER/stages.csv (default folder: profile).')
+    parser.add_argument('--cprofile', action='store_true', help='With --profile, also write a cProfile dump to FOLDER/results.prof.')
+    args = parser.parse_args()
+    main(profile_folder=args.profile, use_cprofile=args.cprofile)
@@ -0,0 +1,181 @@
+"""
+Versioned, columnar session log format for Fitts' law sessions plus a cohort-wide index.
+Each session is stored as an uncompressed .npz archive: a JSON header (subject, method, classifier
+configuration, fps, schema version, ...) and one array per logged column. Members of an .npz are
+loaded lazily, so reading a single column never touches the others.
+Date created: 2026-10-19
+"""
+import os
+import json
+import time
+import pickle
+
+import numpy as np
+
+
+SCHEMA_VERSION = 1
+SESSION_SUFFIX = '.session.npz'
+LEGACY_SUFFIX = '.pkl'
+INDEX_FILENAME = 'sessions.json'
+CONVERTED_FOLDER = '.sessions'      # under the data folder; holds session files converted from legacy pickles
+HEADER_KEY = 'header'
+# Column name -> (dtype, number of values per sample)
+COLUMNS = {
+    'trial_number': (np.int32, 1),
+    'goal_circle': (np.int32, 3),
+    'global_clock': (np.float64, 1),
+    'cursor_position': (np.int32, 3),
+    'class_label': (np.float64, 1),
+    'current_direction': (np.int32, 2)
+}
+
+
+def make_header(subject, method, classifier = None, fps = None, num_circles = None, num_trials = None, created = None, **extra):
+    header = {
+        'schema_version': SCHEMA_VERSION,
+        'subject': str(subject),
+        'method': method,
+        'classifier': classifier,
+        'fps': fps,
+        'num_circles': num_circles,
+        'num_trials': num_trials,
+        'created': created if created is not None else round(time.time() * 1000)
+    }
+    header.update(extra)
+    return header
+
+
+def to_columns(log_dictionary):
+    # Convert the list-of-tuples log kept during a session into typed arrays
+    columns = {}
+    for name, (dtype, width) in COLUMNS.items():
+        values = np.asarray(log_dictionary.get(name, []), dtype=dtype)
+        columns[name] = values.reshape(-1, width) if width > 1 else values.reshape(-1)
+    return columns
+
+
+def write_session(folder, header, log_dictionary, name = None):
+    columns = to_columns(log_dictionary)
+    header = dict(header, num_samples=len(columns['trial_number']), columns=list(columns.keys()))
+    if name is None:
+        name = f"{header['created']}_{header['method']}_subject{header['subject']}"
+    path = os.path.join(folder, name + SESSION_SUFFIX)
+    with open(path, 'wb') as f:
+        np.savez(f, **{HEADER_KEY: np.array(json.dumps(header))}, **columns)
+    return path
+
+
+def read_header(path):
+    with np.load(path) as session:
+        return json.loads(str(session[HEADER_KEY]))
+
+
+def read_session(path, columns = None):
+    """Load the requested columns (all columns if None) of a session file into a dictionary of arrays."""
+    with np.load(path) as session:
+        header = json.loads(str(session[HEADER_KEY]))
+        if header['schema_version'] > SCHEMA_VERSION:
+            raise ValueError(f"Session {path} uses schema version {header['schema_version']}, but only versions <= {SCHEMA_VERSION} are supported.")
+        names = header['columns'] if columns is None else columns
+        return {name: session[name] for name in names}
+
+
+def parse_subject_folder(folder_name):
+    return folder_name[len('subject'):].lstrip('-') if folder_name.startswith('subject') else folder_name
+
+
+def convert_legacy_log(pkl_path, method, subject, output_folder):
+    """Convert a pickled log dictionary from an older FittsLawTest into a session file in output_folder."""
+    with open(pkl_path, 'rb') as f:
+        log_dictionary = pickle.load(f)
+    filename = os.path.basename(pkl_path)
+    timestamp = filename.split('_')[0]
+    goal_circles = np.asarray(log_dictionary['goal_circle']).reshape(-1, 3)
+    header = make_header(
+        subject, method,
+        num_circles=len(np.unique(goal_circles[:, :2], axis=0)),
+        num_trials=len(np.unique(log_dictionary['trial_number'])),
+        created=int(timestamp) if timestamp.isdigit() else None,
+        source=filename
+    )
+    name = filename[:-len(LEGACY_SUFFIX)]
+    os.makedirs(output_folder, exist_ok=True)
+    return write_session(output_folder, header, log_dictionary, name=name)
+
+
+def find_sessions(subject_path, method, subject, converted_path):
+    """
+    Return session files in a subject folder. Legacy pickles without a session file next to them are converted once into
+    converted_path (kept out of the recorded data) and reconverted only if the pickle changes.
+    """
+    filenames = os.listdir(subject_path)
+    sessions = [os.path.join(subject_path, filename) for filename in filenames if filename.endswith(SESSION_SUFFIX)]
+    for filename in filenames:
+        name = filename[:-len(LEGACY_SUFFIX)]
+        if not filename.endswith(LEGACY_SUFFIX) or name + SESSION_SUFFIX in filenames:
+            continue
+        pkl_path = os.path.join(subject_path, filename)
+        converted = os.path.join(converted_path, name + SESSION_SUFFIX)
+        if not os.path.exists(converted) or os.path.getmtime(converted) < os.path.getmtime(pkl_path):
+            converted = convert_legacy_log(pkl_path, method, subject, converted_path)
+        sessions.append(converted)
+    return sorted(sessions)
+
+
+def load_index(data_folder):
+    index_path = os.path.join(data_folder, INDEX_FILENAME)
+    if not os.path.exists(index_path):
+        return {'schema_version': SCHEMA_VERSION, 'sessions': {}}
+    with open(index_path, 'r') as f:
+        return json.load(f)
+
+
+def update_index(data_folder, methods = None):
+    """
+    Scan data_folder/<method>/<subject>/ for session logs and refresh the cohort index.
+    Only sessions that are new or modified since the last scan have their header re-read, and the index file is only
+    rewritten when an entry changed.
+    """
+    index = load_index(data_folder)
+    old_sessions = index['sessions']
+    sessions = {}
+    if methods is None:
+        methods = [name for name in os.listdir(data_folder) if os.path.isdir(os.path.join(data_folder, name)) and not name.startswith('.')]
+    for method in methods:
+        method_path = os.path.join(data_folder, method)
+        if not os.path.isdir(method_path):
+            continue
+        for subject_folder in sorted(os.listdir(method_path)):
+            subject_path = os.path.join(method_path, subject_folder)
+            if not os.path.isdir(subject_path):
+                continue
+            converted_path = os.path.join(data_folder, CONVERTED_FOLDER, method, subject_folder)
+            for path in find_sessions(subject_path, method, parse_subject_folder(subject_folder), converted_path):
+                key = os.path.relpath(path, data_folder)
+                mtime = os.path.getmtime(path)
+                entry = old_sessions.get(key)
+                if entry is None or entry['mtime'] != mtime:
+                    entry = {'mtime': mtime, 'header': read_header(path)}
+                sessions[key] = entry
+    if index['schema_version'] == SCHEMA_VERSION and sessions == old_sessions:
+        return index
+    index = {'schema_version': SCHEMA_VERSION, 'sessions': sessions}
+    with open(os.path.join(data_folder, INDEX_FILENAME), 'w') as f:
+        json.dump(index, f, indent=1)
+    return index
+
+
+def query_sessions(data_folder, refresh = True, **filters):
+    """Return (path, header) pairs for every indexed session whose header matches all filters, e.g. method='vr', num_circles=8."""
+    index = update_index(data_folder) if refresh else load_index(data_folder)
+    matches = []
+    for key, entry in sorted(index['sessions'].items()):
+        header = entry['header']
+        if all(header.get(field) == value for field, value in filters.items()):
+            matches.append((os.path.join(data_folder, key), header))
+    return matches
+
+
+def load_sessions(data_folder, columns = None, refresh = True, **filters):
+    """Load only the requested columns from all sessions matching filters. Returns a list of (header, columns) pairs."""
+    return [(header, read_session(path, columns=columns)) for path, header in query_sessions(data_folder, refresh=refresh, **filters)]
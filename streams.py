@@ -0,0 +1,206 @@
+"""
+Acquisition from one or more synchronized EMG streams (e.g. two Myo armbands or a high-density device).
+Each stream is sent to its own UDP port. When there is more than one stream, a merger process time-aligns them onto
+the first stream's clock and sends the combined samples to MERGED_PORT, where libemg's OnlineDataHandler listens
+as usual. Everything downstream (recording, windowing, feature extraction) therefore sees one stream with
+the summed channel count.
+Date created: 2026-10-19
+"""
+import time
+import pickle
+import socket
+import selectors
+import multiprocessing
+
+import numpy as np
+
+from monitor import start_monitor, MONITOR_ENABLED
+from network import IP, PACKET_SIZE, MERGED_PORT, EMG_PORT, RECORDING_PORT
+
+
+# kind is a libemg streamer (e.g. 'myo' -> libemg.streamers.myo_streamer) or 'replay' to replay recorded data
+STREAMS = [
+    {'name': 'myo', 'kind': 'myo', 'port': MERGED_PORT, 'num_channels': 8, 'sampling_rate': 200}
+]
+# Example bilateral setup: two armbands on their own ports, merged into a 16-channel stream on MERGED_PORT
+# STREAMS = [
+#     {'name': 'left', 'kind': 'myo', 'port': 12350, 'num_channels': 8, 'sampling_rate': 200},
+#     {'name': 'right', 'kind': 'myo', 'port': 12351, 'num_channels': 8, 'sampling_rate': 200}
+# ]
+# The same setup can be tested without hardware by replaying recorded data:
+#     {'name': 'left', 'kind': 'replay', 'folder': 'data/sample', 'port': 12350, 'num_channels': 8, 'sampling_rate': 200}
+ALIGNMENT_LATENCY = 0.05    # seconds to wait for slower streams before emitting merged samples
+
+
+def total_channels(streams = STREAMS):
+    return sum(stream['num_channels'] for stream in streams)
+
+
+class StreamAligner:
+    """
+    Time-aligns samples from several streams onto the clock of the first (reference) stream.
+    Samples are timestamped from their packet's arrival time and the stream's nominal sampling rate. Every reference
+    sample is paired with the most recent sample of each other stream (sample-and-hold), once all streams have
+    had ALIGNMENT_LATENCY seconds to deliver data up to that time.
+    """
+    def __init__(self, streams, latency = ALIGNMENT_LATENCY):
+        self.streams = streams
+        self.latency = latency
+        self.times = [np.zeros(0) for _ in streams]
+        self.samples = [np.zeros((0, stream['num_channels'])) for stream in streams]
+
+    def add(self, stream_idx, samples, arrival_time):
+        samples = np.asarray(samples, dtype=np.float64).reshape(-1, self.streams[stream_idx]['num_channels'])
+        period = 1 / self.streams[stream_idx]['sampling_rate']
+        # The last sample of a packet arrived at arrival_time; earlier ones are spaced by the sampling period, but never
+        # placed before the previous packet's samples
+        times = arrival_time - period * np.arange(len(samples) - 1, -1, -1)
+        if len(self.times[stream_idx]):
+            times = np.maximum(times, self.times[stream_idx][-1] + period * np.arange(1, len(samples) + 1))
+        self.times[stream_idx] = np.concatenate((self.times[stream_idx], times))
+        self.samples[stream_idx] = np.concatenate((self.samples[stream_idx], samples))
+
+    def pop_aligned(self, now):
+        """Return merged (samples, channels) array for all reference samples older than now - latency."""
+        reference_times = self.times[0]
+        num_ready = np.searchsorted(reference_times, now - self.latency, side='right')
+        if num_ready == 0:
+            return np.zeros((0, total_channels(self.streams)))
+        ready_times = reference_times[:num_ready]
+        if any(len(times) == 0 for times in self.times[1:]):
+            # Can't align until every stream has started - drop reference samples that are already late
+            self._trim(0, num_ready)
+            return np.zeros((0, total_channels(self.streams)))
+        merged = [self.samples[0][:num_ready]]
+        for stream_idx in range(1, len(self.streams)):
+            indices = np.searchsorted(self.times[stream_idx], ready_times, side='right') - 1
+            merged.append(self.samples[stream_idx][np.clip(indices, 0, None)])
+            # Keep the last used sample so the next batch can still hold it
+            self._trim(stream_idx, max(indices[-1], 0))
+        self._trim(0, num_ready)
+        return np.concatenate(merged, axis=1)
+
+    def _trim(self, stream_idx, num_samples):
+        self.times[stream_idx] = self.times[stream_idx][num_samples:]
+        self.samples[stream_idx] = self.samples[stream_idx][num_samples:]
+
+
+def merge_streams(streams, ip = IP, port = MERGED_PORT, latency = ALIGNMENT_LATENCY):
+    """Receive each stream on its port and forward time-aligned merged samples to port. Runs until killed."""
+    selector = selectors.DefaultSelector()
+    for stream_idx, stream in enumerate(streams):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((ip, stream['port']))
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, stream_idx)
+    out_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    aligner = StreamAligner(streams, latency=latency)
+    while True:
+        for key, _ in selector.select(timeout=latency / 2):
+            data, _ = key.fileobj.recvfrom(PACKET_SIZE)
+            aligner.add(key.data, pickle.loads(data), time.perf_counter())
+        # One sample per packet, like libemg's streamers: OnlineDataHandler stores each packet as one row
+        for row in aligner.pop_aligned(time.perf_counter()):
+            out_sock.sendto(pickle.dumps(row.tolist()), (ip, port))
+
+
+def load_replay_data(folder, num_channels):
+    # Concatenate every recorded rep in folder and tile/truncate channels so any recording can feed any stream size
+    from catalog import get_catalog
+    catalog = get_catalog(folder)
+    data = np.concatenate([catalog.load(entry) for _, entry in catalog.select(folder=folder)])
+    repeats = int(np.ceil(num_channels / data.shape[1]))
+    return np.tile(data, (1, repeats))[:, :num_channels]
+
+
+def replay_streamer(folder, num_channels, sampling_rate, ip = IP, port = MERGED_PORT, samples_per_batch = 10, loop = True):
+    """
+    Send recorded data over UDP at sampling_rate, mimicking a libemg streamer (one sample per packet). Used to test the
+    pipeline without hardware. Samples are sent in bursts of samples_per_batch to keep the pacing cheap.
+    """
+    data = load_replay_data(folder, num_channels)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    batch_period = samples_per_batch / sampling_rate
+    next_send = time.perf_counter()
+    while True:
+        for start in range(0, len(data), samples_per_batch):
+            for row in data[start:start + samples_per_batch]:
+                sock.sendto(pickle.dumps(row.tolist()), (ip, port))
+            next_send += batch_period
+            time.sleep(max(0, next_send - time.perf_counter()))
+        if not loop:
+            break
+
+
+def start_stream(stream):
+    if stream['kind'] == 'replay':
+        process = multiprocessing.Process(target=replay_streamer, daemon=True, args=(stream['folder'], stream['num_channels'], stream['sampling_rate']),
+                                          kwargs={'ip': IP, 'port': stream['port']})
+        process.start()
+        return process
+    import libemg
+    streamer = getattr(libemg.streamers, f"{stream['kind']}_streamer")
+    return streamer(ip=IP, port=stream['port'], **stream.get('options', {}))
+
+
+def start_streams(streams = STREAMS, monitor = MONITOR_ENABLED, record = False):
+    """
+    Start every configured stream and, if there are several, the merger that combines them on MERGED_PORT.
+    With monitor, the combined stream is routed through the signal monitor (see monitor.py) on its way to MERGED_PORT.
+    With record, it is sent to RECORDING_PORT instead, where a continuous.ContinuousRecorder (started beforehand)
+    forwards it to MERGED_PORT.
+    """
+    if len(streams) > 1 and any(stream['port'] in (MERGED_PORT, EMG_PORT, RECORDING_PORT) for stream in streams):
+        raise ValueError(f'When merging multiple streams, no stream can use the merged port ({MERGED_PORT}), monitor port ({EMG_PORT}) '
+                         f'or recording port ({RECORDING_PORT}).')
+    processes = []
+    output_port = RECORDING_PORT if record else MERGED_PORT
+    if monitor:
+        processes.append(start_monitor(total_channels(streams), streams[0]['sampling_rate'], output_port))
+        output_port = EMG_PORT
+    if len(streams) == 1:
+        processes.append(start_stream(dict(streams[0], port=output_port)))
+    else:
+        processes.extend(start_stream(stream) for stream in streams)
+        merger = multiprocessing.Process(target=merge_streams, args=(streams,), kwargs={'port': output_port}, daemon=True)
+        merger.start()
+        processes.append(merger)
+    return processes
+
+
+def benchmark_channels(channel_counts = (8, 16, 32, 64, 128, 256), num_windows = 2000, repeats = 20):
+    """Time windowing, feature extraction and prediction as the channel count grows. Returns one row per channel count."""
+    import libemg
+    from classification import WINDOW_SIZE, WINDOW_INCREMENT, CLASSIFIER, extract_features, get_windows
+    rng = np.random.default_rng(0)
+    num_samples = (num_windows - 1) * WINDOW_INCREMENT + WINDOW_SIZE
+    rows = []
+    for num_channels in channel_counts:
+        data = rng.normal(scale=20, size=(num_samples, num_channels))
+        start = time.perf_counter()
+        windows = get_windows(data, WINDOW_SIZE, WINDOW_INCREMENT)
+        windowing_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        features = extract_features(windows)
+        extraction_time = time.perf_counter() - start
+
+        labels = rng.integers(0, 5, size=num_windows)
+        classifier = libemg.emg_classifier.EMGClassifier()
+        classifier.fit(CLASSIFIER, {'training_features': features, 'training_labels': labels})
+        # Online latency: one window at a time, as OnlineEMGClassifier processes them
+        single_window = windows[:1]
+        start = time.perf_counter()
+        for _ in range(repeats):
+            classifier.run(extract_features(single_window))
+        online_latency = (time.perf_counter() - start) / repeats
+        rows.append({
+            'channels': num_channels,
+            'windowing_ms': windowing_time * 1000,
+            'extraction_ms': extraction_time * 1000,
+            'extraction_us_per_window': extraction_time / num_windows * 1e6,
+            'online_latency_ms': online_latency * 1000
+        })
+        print(f"{num_channels:4d} channels: windowing {rows[-1]['windowing_ms']:7.2f} ms, features {rows[-1]['extraction_ms']:8.2f} ms "
+              f"({rows[-1]['extraction_us_per_window']:6.1f} us/window), online latency {rows[-1]['online_latency_ms']:6.2f} ms/window")
+    return rows
@@ -0,0 +1,179 @@
+"""
+Reproducible synthetic EMG datasets for scale and stress testing without hardware.
+Generates class-conditional EMG-like signals in the same on-disk layout as real recordings (<method>/subject<N>/ with
+R_x_C_y.csv rep files and metadata.json, or a continuous session), plus synthetic Fitts' law session logs.
+Every subject is seeded from (seed, method, subject), so any subject can be regenerated on its own and large cohorts
+can be generated in parallel.
+Date created: 2026-10-19
+"""
+import os
+import json
+import math
+import multiprocessing
+
+import numpy as np
+
+import session_log
+from training import NUM_REPS, REP_TIME, SGT, VR
+from classification import LABEL_NAMES, CLASSIFIER, FEATURES, WINDOW_SIZE, WINDOW_INCREMENT
+from continuous import STREAM_FILENAME, HEADER_FILENAME, LABELS_FILENAME, LABEL_COLUMNS, MOVEMENT_EVENT, DTYPE
+
+
+NUM_CHANNELS = 8
+SAMPLING_RATE = 200
+NO_MOTION = LABEL_NAMES.index('No Motion')
+EMG_BAND = (20, 90)         # Hz; most surface EMG power, limited by the Myo's 200 Hz sampling rate
+MAX_AMPLITUDE = 127         # Myo samples are int8
+CHUNK_TIME = 60             # seconds of continuous signal generated at a time
+# Fitts' law test geometry, matching isofitts.FittsLawTest
+WIDTH, HEIGHT = 1250, 750
+BIG_RADIUS, SMALL_RADIUS = 275, 40
+CURSOR_SIZE = 14
+VELOCITY = 10
+DWELL_TIME = 3
+
+
+def subject_rng(seed, method, subject_idx):
+    method_key = int.from_bytes(method.encode('utf-8'), 'little')
+    return np.random.default_rng(np.random.SeedSequence([seed, method_key, subject_idx]))
+
+
+def make_subject_profile(rng, num_classes = len(LABEL_NAMES), num_channels = NUM_CHANNELS):
+    """Per-class channel activation pattern (RMS per channel) for one subject."""
+    gains = rng.lognormal(mean=2.5, sigma=0.6, size=(num_classes, num_channels))
+    # Each active class is dominated by a few neighbouring electrodes around the armband
+    centers = rng.permutation(num_channels)[:num_classes]
+    distance = np.abs(np.arange(num_channels) - centers.reshape(-1, 1))
+    distance = np.minimum(distance, num_channels - distance)
+    gains *= 1 + 3 * np.exp(-distance ** 2 / 2)
+    gains[NO_MOTION] = rng.uniform(1, 2, size=num_channels)
+    return {'gains': gains, 'noise': rng.uniform(0.5, 1.5)}
+
+
+def generate_emg(rng, profile, class_idx, num_samples, sampling_rate = SAMPLING_RATE):
+    """Band-limited Gaussian noise scaled by the class's channel pattern, with a slowly varying contraction level."""
+    num_channels = profile['gains'].shape[1]
+    white = rng.normal(size=(num_samples, num_channels))
+    spectrum = np.fft.rfft(white, axis=0)
+    frequencies = np.fft.rfftfreq(num_samples, d=1 / sampling_rate)
+    band = (frequencies >= EMG_BAND[0]) & (frequencies <= EMG_BAND[1])
+    signal = np.fft.irfft(spectrum * band.reshape(-1, 1), n=num_samples, axis=0)
+    signal /= signal.std(axis=0, keepdims=True) + 1e-12
+    envelope = 1 + 0.2 * np.sin(2 * np.pi * rng.uniform(0.1, 0.5) * np.arange(num_samples) / sampling_rate + rng.uniform(0, 2 * np.pi))
+    signal = signal * profile['gains'][class_idx] * envelope.reshape(-1, 1) + rng.normal(scale=profile['noise'], size=signal.shape)
+    return np.clip(np.round(signal), -MAX_AMPLITUDE - 1, MAX_AMPLITUDE).astype(np.int8)
+
+
+def write_rep_files(folder, rng, profile, num_reps = NUM_REPS, rep_time = REP_TIME, sampling_rate = SAMPLING_RATE):
+    metadata = {'continuous': False, 'randomize': True, 'gifs': False}
+    num_samples = int(rep_time * sampling_rate)
+    for rep in range(num_reps):
+        for class_idx, class_name in enumerate(LABEL_NAMES):
+            path = os.path.join(folder, f'R_{rep}_C_{class_idx}.csv')
+            np.savetxt(path, generate_emg(rng, profile, class_idx, num_samples, sampling_rate), fmt='%d', delimiter=',')
+            metadata[path] = {'rep_idx': rep, 'class_idx': class_idx, 'class_name': class_name.replace(' ', '_'), 'file_type': 'png'}
+    with open(os.path.join(folder, 'metadata.json'), 'w') as f:
+        json.dump(metadata, f)
+
+
+def write_continuous_session(folder, rng, profile, duration, rep_time = REP_TIME, rest_time = 1, sampling_rate = SAMPLING_RATE):
+    """Write a continuous session of at least duration seconds: movements of rep_time seconds separated by rest_time of no motion."""
+    num_channels = profile['gains'].shape[1]
+    with open(os.path.join(folder, HEADER_FILENAME), 'w') as f:
+        json.dump({'num_channels': num_channels, 'sampling_rate': sampling_rate, 'dtype': DTYPE, 'created': 0}, f)
+    rep_samples = int(rep_time * sampling_rate)
+    rest_samples = int(rest_time * sampling_rate)
+    movements_per_chunk = max(1, int(CHUNK_TIME // (rep_time + rest_time)))
+    num_movements = int(math.ceil(duration / (rep_time + rest_time)))
+    num_samples = 0
+    with open(os.path.join(folder, STREAM_FILENAME), 'wb') as stream, open(os.path.join(folder, LABELS_FILENAME), 'w') as labels:
+        labels.write(','.join(LABEL_COLUMNS) + '\n')
+        # Generated a chunk at a time so memory stays bounded for hours-long sessions
+        for chunk_start in range(0, num_movements, movements_per_chunk):
+            chunk = []
+            for movement in range(chunk_start, min(chunk_start + movements_per_chunk, num_movements)):
+                cycle, class_idx = divmod(movement, len(LABEL_NAMES))
+                # Long sessions cycle through the NUM_REPS reps that parse_data and cross-validation fold over
+                rep = cycle % NUM_REPS
+                labels.write(f'{num_samples},{num_samples / sampling_rate},{MOVEMENT_EVENT},{rep},{class_idx},-1\n')
+                chunk.append(generate_emg(rng, profile, class_idx, rep_samples, sampling_rate))
+                chunk.append(generate_emg(rng, profile, NO_MOTION, rest_samples, sampling_rate))
+                num_samples += rep_samples + rest_samples
+            np.concatenate(chunk).astype(DTYPE).tofile(stream)
+
+
+def get_circles(num_circles):
+    # Same placement as FittsLawTest.draw_circles (centers)
+    angles = range(0, 360, 360 // num_circles)
+    return [(int(WIDTH // 2 - SMALL_RADIUS + math.cos(math.radians(angle)) * BIG_RADIUS) + SMALL_RADIUS,
+             int(HEIGHT // 2 - SMALL_RADIUS + math.sin(math.radians(angle)) * BIG_RADIUS) + SMALL_RADIUS) for angle in angles]
+
+
+def get_goal_sequence(num_circles, num_trials):
+    # Same ordering as FittsLawTest.get_new_goal_circle: alternate across the circle
+    goals = [0]
+    jumps = [num_circles // 2, num_circles // 2 + 1]
+    for trial in range(1, num_trials):
+        goals.append((goals[-1] + jumps[(trial - 1) % 2]) % num_circles)
+    return goals
+
+
+def generate_fitts_log(rng, num_circles = 8, num_trials = 15, fps = 60, error_rate = 0.05):
+    """Simulate a cursor driven by a noisy classifier through the Fitts' law test, returning a FittsLawTest-style log dictionary."""
+    directions = {0: (0, VELOCITY), 1: (0, -VELOCITY), NO_MOTION: (0, 0), 3: (VELOCITY, 0), 4: (-VELOCITY, 0)}
+    circles = get_circles(num_circles)
+    cursor = [WIDTH // 2, HEIGHT // 2]
+    clock = 0.0
+    log_dictionary = {'trial_number': [], 'goal_circle': [], 'global_clock': [], 'cursor_position': [], 'class_label': [], 'current_direction': []}
+    for trial, goal in enumerate(get_goal_sequence(num_circles, num_trials)):
+        target = circles[goal]
+        dwell_frames = 0
+        while dwell_frames < DWELL_TIME * fps:
+            dx, dy = target[0] - cursor[0], target[1] - cursor[1]
+            in_target = math.hypot(dx, dy) < SMALL_RADIUS + CURSOR_SIZE / 2
+            if in_target:
+                intended = NO_MOTION
+            elif abs(dx) > abs(dy):
+                intended = 3 if dx > 0 else 4
+            else:
+                intended = 0 if dy > 0 else 1
+            label = intended if rng.random() >= error_rate else int(rng.integers(len(LABEL_NAMES)))
+            direction = list(directions[label])
+            log_dictionary['trial_number'].append(trial)
+            log_dictionary['goal_circle'].append((target[0], target[1], SMALL_RADIUS * 2))
+            log_dictionary['global_clock'].append(clock)
+            log_dictionary['cursor_position'].append((cursor[0], cursor[1], CURSOR_SIZE))
+            log_dictionary['class_label'].append(float(label))
+            log_dictionary['current_direction'].append(direction)
+            cursor = [min(max(cursor[0] + direction[0], CURSOR_SIZE), WIDTH - CURSOR_SIZE), min(max(cursor[1] + direction[1], CURSOR_SIZE), HEIGHT - CURSOR_SIZE)]
+            dwell_frames = dwell_frames + 1 if in_target else 0
+            clock += 1 / fps + rng.normal(scale=0.001)
+    return log_dictionary
+
+
+def generate_subject(output_folder, method, subject_idx, seed = 0, continuous_time = None, num_sessions = 1, num_circles = 8, num_trials = 15, fps = 60):
+    """Generate one subject's training data (rep files, or a continuous session of continuous_time seconds) and Fitts' sessions."""
+    rng = subject_rng(seed, method, subject_idx)
+    folder = os.path.join(output_folder, method, f'subject{subject_idx}')
+    os.makedirs(folder, exist_ok=True)
+    profile = make_subject_profile(rng)
+    if continuous_time is None:
+        write_rep_files(folder, rng, profile)
+    else:
+        write_continuous_session(folder, rng, profile, continuous_time)
+    classifier = {'name': CLASSIFIER, 'features': FEATURES, 'window_size': WINDOW_SIZE, 'window_increment': WINDOW_INCREMENT}
+    for session in range(num_sessions):
+        header = session_log.make_header(subject_idx, method, classifier=classifier, fps=fps, num_circles=num_circles,
+                                         num_trials=num_trials, created=session, synthetic_seed=seed)
+        log_dictionary = generate_fitts_log(rng, num_circles=num_circles, num_trials=num_trials, fps=fps)
+        session_log.write_session(folder, header, log_dictionary, name=f'synthetic{session}')
+    return folder
+
+
+def generate_dataset(output_folder, num_subjects, methods = (SGT, VR), seed = 0, continuous_time = None, num_sessions = 1, workers = 1):
+    """Generate num_subjects subjects for every method under output_folder/<method>/subject<N>/, optionally in parallel."""
+    jobs = [(output_folder, method, subject_idx, seed, continuous_time, num_sessions) for method in methods for subject_idx in range(num_subjects)]
+    if workers == 1:
+        return [generate_subject(*job) for job in jobs]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.starmap(generate_subject, jobs)
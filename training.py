@@ -5,14 +5,9 @@ Date created: 2023-11-03
 """
 import os
 import socket
-import websockets
 import datetime as dt
 import time
 
-import libemg
-import pandas as pd
-import asyncio
-
 
 # Constants
 SUBJECT_ID = 0
@@ -29,6 +24,7 @@ OUTPUT_FOLDER = os.path.join(TRAINING_FOLDER, SUBJECT_FOLDER, '')
 NUM_REPS = 5
 REP_TIME = 5
 TIME_BETWEEN_REPS = 1
+CONTINUOUS_RECORDING = True     # VR only: record one continuous stream + event track instead of one file per rep
 
 
 CLIENT_DESCRIPTIONS = ['Hand Close', 'Hand Open', 'No Motion', 'Wrist Extension', 'Wrist Flexion']
@@ -36,8 +32,6 @@ SERVER_DESCRIPTIONS = ['No Motion', 'Hand Close', 'Hand Open', 'Wrist Flexion',
 
 CHANGE_INDEX_LIST = [1, 2, 0, 4, 3]
 
-hostname = socket.gethostname()
-IP = socket.gethostbyname(hostname)
 PORT = 5006
 
 # online_data_handler = libemg.data_handler.OnlineDataHandler()
@@ -62,11 +56,19 @@ async def run_server_in_loop(websocket, path):
         await websocket.send(sendMessage)
         log(f"Sent: {sendMessage}")
 
+def get_ip():
+    # Resolved on demand rather than at import time since the lookup can stall on misconfigured DNS
+    hostname = socket.gethostname()
+    return socket.gethostbyname(hostname)
+
 def setup_socket_server():
-    log_imp(f"Hostname: {IP} and Port: {PORT}")
+    import asyncio
+    import websockets
+    ip = get_ip()
+    log_imp(f"Hostname: {ip} and Port: {PORT}")
     # online_data_handler.start_listening()
 
-    start_server = websockets.serve(run_server_in_loop, IP, PORT)
+    start_server = websockets.serve(run_server_in_loop, ip, PORT)
 
     asyncio.get_event_loop().run_until_complete(start_server)
     asyncio.get_event_loop().run_forever()
@@ -79,15 +81,24 @@ def handle_message(message):
     p0 = parts[0].strip()
     if p0 == "ExperimentHasStarted":
         print('start experiment')
+        if CONTINUOUS_RECORDING:
+            recorder.mark('start')
     elif p0 == "ExperimentHasEnded":
         print('end experiment')
+        if CONTINUOUS_RECORDING:
+            recorder.mark('end')
     elif p0 == "MovementInfo":
         params = parts[2].split(",")
         repNumber, movementNumber, time_in_millis = int(params[0].strip()), int(params[1].strip()), int(params[2].strip())
         startDateTime = dt.datetime.fromtimestamp(time_in_millis / 1000.0, tz=dt.timezone.utc)
         movementIndex = CHANGE_INDEX_LIST[movementNumber]
         
-        vr_training(OUTPUT_FOLDER, repNumber, movementIndex)
+        if CONTINUOUS_RECORDING:
+            from continuous import MOVEMENT_EVENT
+            log_imp(f'Recording movement: {repNumber - 1}, {movementIndex}')
+            recorder.mark(MOVEMENT_EVENT, rep=repNumber - 1, class_idx=movementIndex, vr_time=time_in_millis)
+        else:
+            vr_training(OUTPUT_FOLDER, repNumber, movementIndex)
 
 def check_for_directory(directory, overwriting = True):
     print(f'Saving data to {directory}')
@@ -100,6 +111,7 @@ def check_for_directory(directory, overwriting = True):
         exit()
 
 def screen_guided_training(output_folder):
+    import libemg
     # Launch screen-guided training (see https://libemg.github.io/libemg/emg_toolbox.html#module-libemg.screen_guided_training)
     sgt = libemg.screen_guided_training.ScreenGuidedTraining()
     # Download gestures if needed (see https://github.com/libemg/LibEMGGestures)
@@ -115,6 +127,7 @@ def screen_guided_training(output_folder):
 
     
 def vr_training(output_folder, rep_number, class_number):
+    import pandas as pd
     rep_number -= 1
     print(rep_number, class_number)
     online_data_handler.raw_data.reset_emg()    # reset data
@@ -136,15 +149,29 @@ def vr_training(output_folder, rep_number, class_number):
     
 
 def main():
-    libemg.streamers.myo_streamer()
+    import libemg
+    from streams import start_streams
+    check_for_directory(OUTPUT_FOLDER)
+    record_continuous = TRAINING_METHOD == VR and CONTINUOUS_RECORDING
+    if record_continuous:
+        from streams import total_channels, STREAMS
+        from continuous import ContinuousRecorder
+        global recorder
+        # The recorder receives the stream itself (and forwards it to the OnlineDataHandler) so no samples are dropped
+        recorder = ContinuousRecorder(OUTPUT_FOLDER, total_channels(), STREAMS[0]['sampling_rate'])
+        recorder.start()
+    start_streams(record=record_continuous)
     global online_data_handler
     online_data_handler = libemg.data_handler.OnlineDataHandler()
     online_data_handler.start_listening()
-    check_for_directory(OUTPUT_FOLDER)
     if TRAINING_METHOD == SGT:
         screen_guided_training(OUTPUT_FOLDER)
     elif TRAINING_METHOD == VR:
-        setup_socket_server()
+        try:
+            setup_socket_server()
+        finally:
+            if record_continuous:
+                recorder.stop()
     else:
         print('Unrecognized training method')
     online_data_handler.stop_listening()